@@ -1,6 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
-from pydantic import BaseModel
-from typing import Optional, List
+import asyncio
+import base64
+import bisect
+import hashlib
+import hmac
+import orjson
+import weakref
+from dataclasses import dataclass
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, StringConstraints
+from typing import Annotated, Optional, List
 from datetime import datetime
  
 
@@ -9,55 +19,249 @@ from open_webui.utils.vault import (
     store_agent_connection_in_vault,
     get_agent_connection_from_vault,
     delete_agent_connection_from_vault,
+    move_agent_connection_in_vault,
     get_vault_client,
+    format_secret_key,
     sanitize_agent_name,
     sanitize_key_field,
+    list_agent_connection_scopes,
+    VAULT_POOL_SIZE,
+    run_vault_call,
 )
 from open_webui.config import ENABLE_VAULT_INTEGRATION as VAULT_CONFIG
-from open_webui.models.users import Users
+from open_webui.env import WEBUI_SECRET_KEY
+from open_webui.models.users import UserModel, Users
+from open_webui.utils.misc import TTLCache
 from loguru import logger
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
+# Authenticated caller, declared once for every route below
+VerifiedUser = Annotated[UserModel, Depends(get_verified_user)]
+AdminUser = Annotated[UserModel, Depends(get_admin_user)]
 
-def _parse_requested_items(raw_keys: Optional[str]) -> Optional[set[str]]:
-    """Return a set of slash-formatted header items from X-LTAI-Vault-Keys.
+# Users from the database, indexed by id, for the admin listing.
+_USERS_CACHE = TTLCache(maxsize=4, ttl=10)
+
+# Lowercased Vault scopes that do not name an agent
+_COMMON_SCOPE = "common"
+_DEFAULT_SCOPE = "default"
+
+
+# Keys requested from a scope the X-LTAI-Vault-Keys header does not mention
+_NOTHING_REQUESTED = frozenset()
+
+# (is_common, agent_id) for the scopes that do not name an agent
+_SPECIAL_SCOPE_FIELDS = {
+    _COMMON_SCOPE: (True, None),
+    _DEFAULT_SCOPE: (False, None),
+}
+
+
+def _scope_fields(scope: str) -> tuple[bool, Optional[str]]:
+    """Map a lowercased Vault scope to the (is_common, agent_id) pair exposed by the API."""
+    return _SPECIAL_SCOPE_FIELDS.get(scope) or (False, scope)
+
+
+def _secret_location(user_id: str, key_name: str, agent_id: Optional[str], is_common: bool) -> tuple[str, str]:
+    """Identify a stored field the same way the Vault helpers resolve it."""
+    return format_secret_key(key_name, user_id, agent_id, is_common), sanitize_key_field(key_name)
+
+
+# One lock per vault user id so concurrent listings of one user share a single LIST call.
+_SCOPE_LOCKS: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _keyed_lock(locks: weakref.WeakValueDictionary, key: str) -> asyncio.Lock:
+    """Return the lock registered for key, creating it on first use."""
+    lock = locks.get(key)
+    if lock is None:
+        lock = asyncio.Lock()
+        locks[key] = lock
+    return lock
+
+
+def _log_info(message: str, *args) -> None:
+    """Emit an info record from this module; scheduled as a background task after responses."""
+    logger.info(message, *args)
+
+
+async def _vault_call(func, *args, **kwargs):
+    """Run a blocking Vault helper on the Vault thread pool, turning unexpected errors into a 500."""
+    try:
+        return await run_vault_call(func, *args, **kwargs)
+    except Exception as e:
+        logger.error("Vault call {} failed: {}", getattr(func, '__name__', func), e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def _scope_label(agent_id: Optional[str], is_common: bool) -> str:
+    """Scope segment for key ids and logs: "common", "default" or the sanitized agent name."""
+    if is_common:
+        return _COMMON_SCOPE
+    return sanitize_agent_name(agent_id) if agent_id else _DEFAULT_SCOPE
+
+
+def _make_key_id(user_id: str, key_name: str, agent_id: Optional[str], is_common: bool) -> str:
+    """Build the key_id for a stored key, using the sanitized field name stored in Vault."""
+    return encode_key_id(user_id, sanitize_key_field(key_name), _scope_label(agent_id, is_common))
+
+
+def encode_key_id(user_id: str, key_name: str, scope: str) -> str:
+    """Encode (user_id, key_name, scope) into an opaque, URL-safe key_id.
+
+    Components are length-prefixed before base64url encoding, so user ids, key
+    names and agent scopes may all contain underscores without making the id
+    ambiguous.
+    """
+    raw = f"{len(user_id)}:{user_id}:{len(key_name)}:{key_name}:{scope}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_structured_key_id(key_id: str) -> Optional[tuple[str, str, str]]:
+    """Decode a key_id produced by encode_key_id, or return None if it is not one."""
+    try:
+        padded = key_id + "=" * (-len(key_id) % 4)
+        raw = base64.urlsafe_b64decode(padded).decode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+    parts = []
+    pos = 0
+    for _ in range(2):
+        sep = raw.find(":", pos)
+        length = raw[pos:sep]
+        if sep == -1 or not (length.isascii() and length.isdigit()):
+            return None
+        start = sep + 1
+        end = start + int(length)
+        if end >= len(raw) or raw[end] != ":":
+            return None
+        parts.append(raw[start:end])
+        pos = end + 1
+    return parts[0], parts[1], raw[pos:]
+
+
+def decode_key_id(key_id: str) -> tuple[str, str, str]:
+    """Split a key_id into (user_id, key_name, scope).
+
+    Accepts the opaque format from encode_key_id as well as the legacy
+    "<user_id>_<key_name>_<scope>" format, which is split on the first and last
+    underscore.
+
+    Raises:
+        ValueError: If the key_id cannot be parsed.
+    """
+    decoded = _decode_structured_key_id(key_id)
+    if decoded is None:
+        user_id, user_sep, rest = key_id.partition('_')
+        key_name, scope_sep, scope = rest.rpartition('_')
+        if not (user_sep and scope_sep):
+            raise ValueError("Invalid key_id format")
+        decoded = (user_id, key_name, scope)
+
+    user_id, key_name, scope = decoded
+    if not user_id or not key_name or not scope:
+        raise ValueError("Invalid key_id format")
+    return decoded
+
+
+def _authorize(user, owner_id: str) -> None:
+    """Allow access to another user's keys only for admins."""
+    if owner_id != user.id and user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+
+def _resolve_key_id(key_id: str, user) -> tuple[str, str, str]:
+    """Decode a key_id from the URL and check that the caller may access it."""
+    try:
+        decoded = decode_key_id(key_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid key_id format")
+    _authorize(user, decoded[0])
+    return decoded
+
+
+@dataclass(frozen=True)
+class KeyIdContext:
+    """A key_id resolved for a caller allowed to access it."""
+    key_id: str
+    owner_id: str
+    key_name: str
+    scope: str
+    is_common: bool
+    agent_id: Optional[str]
+    vault_user_id: str
+
+
+def _key_id_context(key_id: str, request: Request, user) -> KeyIdContext:
+    """Decode and authorize key_id and work out where it is stored (400/403 on failure)."""
+    owner_id, key_name, scope = _resolve_key_id(key_id, user)
+    is_common, agent_id = _scope_fields(scope)
+    return KeyIdContext(
+        key_id=key_id,
+        owner_id=owner_id,
+        key_name=key_name,
+        scope=scope,
+        is_common=is_common,
+        agent_id=agent_id,
+        vault_user_id=request.headers.get('x-ltai-vault-user') or owner_id,
+    )
+
+
+async def get_key_id_context(key_id: str, request: Request, user: VerifiedUser) -> KeyIdContext:
+    return _key_id_context(key_id, request, user)
+
+
+# The {key_id} of a route, resolved once before the handler runs
+KeyIdCtx = Annotated[KeyIdContext, Depends(get_key_id_context)]
+
+
+def _parse_requested_items(raw_keys: Optional[str]) -> Optional[dict[str, frozenset[str]]]:
+    """Index the slash-formatted items of X-LTAI-Vault-Keys by the scope they select.
 
     Accepted formats only:
       - "COMMON/<key_name>"
       - "<agent_scope>/<key_name>" where agent_scope is underscore-normalized
+
+    The key portion may contain slashes. Keys are stored SANITIZED (slashes/backslashes ->
+    underscore), so each one is sanitized here once rather than per listed field.
     """
     if not raw_keys:
         return None
-    items = {k.strip() for k in raw_keys.split(',') if k.strip() and '/' in k}
-    return items if items else None
+    requested = {}
+    for item in raw_keys.split(','):
+        scope_part, sep, key_part = item.strip().partition("/")
+        if not sep:
+            continue
+        # Map "COMMON" header scope to stored path scope "common"
+        header_scope = _COMMON_SCOPE if scope_part == "COMMON" else scope_part
+        requested.setdefault(header_scope, set()).add(sanitize_key_field(key_part))
+    return {scope: frozenset(keys) for scope, keys in requested.items()} or None
 
 
-def _is_requested_key(key_name: str, agent_scope: str, requested_items: Optional[set[str]]) -> bool:
+def _is_requested_key(
+    key_name: str, agent_scope: str, requested_items: Optional[dict[str, frozenset[str]]]
+) -> bool:
     """Decide if a given Vault field key_name should be included for a specific agent scope.
 
-    Only slash-formatted items are supported: "<scope>/<key>". The key portion may contain slashes.
     Scope must match the current agent_scope ("common", "default", or underscore-normalized agent name).
-    Key name is compared against the SANITIZED header key (slashes/backslashes -> underscore),
-    because fields are stored sanitized in Vault.
     """
     if not requested_items:
         return True
-    for item in requested_items:
-        if "/" not in item:
-            continue
-        scope_part, key_part = item.split("/", 1)
-        # Map "COMMON" header scope to stored path scope "common"
-        header_scope = "common" if scope_part == "COMMON" else scope_part
-        # Sanitize the key part to match stored field names
-        if header_scope == agent_scope.lower() and key_name == sanitize_key_field(key_part):
-            return True
-    return False
+    return key_name in requested_items.get(agent_scope.lower(), _NOTHING_REQUESTED)
+
+
+# Key names are free-form but must not be blank
+KeyName = Annotated[str, StringConstraints(pattern=r"\S")]
+# New keys also drop surrounding whitespace. Names of stored keys are taken as they are,
+# since stripping them would no longer match the field they are stored under.
+NewKeyName = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
 
 
 class AgentConnectionCreate(BaseModel):
-    key_name: str
-    key_value: str
+    key_name: NewKeyName
+    key_value: str = Field(min_length=1)
     agent_id: Optional[str] = None
     is_common: bool = False
 
@@ -67,6 +271,7 @@ class AgentConnectionResponse(BaseModel):
     key_name: str
     agent_id: Optional[str] = None
     is_common: bool = False
+    key_value: Optional[str] = None
     created_at: datetime
     user_id: Optional[str] = None
     user_name: Optional[str] = None
@@ -74,431 +279,624 @@ class AgentConnectionResponse(BaseModel):
 
 
 class AgentConnectionUpdate(BaseModel):
-    key_name: Optional[str] = None
+    key_name: Optional[KeyName] = None
     key_value: Optional[str] = None
     agent_id: Optional[str] = None
     is_common: Optional[bool] = None
 
 
+class AgentConnectionBatchGet(BaseModel):
+    key_ids: List[str] = Field(min_length=1, max_length=100)
+
+
 @router.post("/", response_model=AgentConnectionResponse)
 async def create_agent_connection(
     connection: AgentConnectionCreate,
     request: Request,
-    user=Depends(get_verified_user)
+    background_tasks: BackgroundTasks,
+    user: VerifiedUser
 ):
     """Create or update a key in Vault."""
+    # Prepare connection data for vault
+    vault_connection = {
+        "name": connection.key_name,
+        "value": connection.key_value,
+        "agent_id": connection.agent_id,
+        "is_common": connection.is_common
+    }
+    
+    # Store in vault if enabled
+    vault_user_id = request.headers.get('x-ltai-vault-user') or user.id
+    if VAULT_CONFIG.value:
+        success = await _vault_call(
+            store_agent_connection_in_vault, vault_connection, vault_user_id
+        )
+        if not success:
+            raise HTTPException(status_code=500, detail="Failed to store key in Vault")
+    
+    scope = _scope_label(connection.agent_id, connection.is_common)
+    background_tasks.add_task(
+        _log_info, "Stored key {} for user {} (scope: {})", connection.key_name, vault_user_id, scope
+    )
+    
+    key_id = _make_key_id(vault_user_id, connection.key_name, connection.agent_id, connection.is_common)
+    
+    return AgentConnectionResponse.model_construct(
+        key_id=key_id,
+        key_name=connection.key_name,
+        agent_id=connection.agent_id,
+        is_common=connection.is_common,
+        created_at=datetime.now()
+    )
+
+
+def _list_vault_user_ids(vault_client) -> set[str]:
+    """List the user ids that have anything stored under users/ (blocking)."""
+    keys = vault_client.list_secrets("users")
+    if keys is None:
+        raise RuntimeError("Cannot list Vault users")
+    return {key.removesuffix('/') for key in keys}
+
+
+async def _get_user_scopes(vault_user_id: str, recache: bool = False) -> tuple[str, ...]:
+    """Return the agent scopes for a vault user; the Vault helper caches the listing.
+
+    Concurrent calls for the same user wait on one listing instead of each issuing
+    their own. ``recache`` skips the cached listing and refreshes it.
+    """
+    async with _keyed_lock(_SCOPE_LOCKS, vault_user_id):
+        scopes = await run_vault_call(list_agent_connection_scopes, vault_user_id, recache=recache)
+    if scopes is None:
+        raise RuntimeError("Vault is not reachable")
+    return scopes
+
+
+def _read_user_scope(vault_client, vault_user_id: str, agent_scope: str) -> Optional[dict]:
+    """Read the fields of users/{vault_user_id}/{agent_scope} (blocking)."""
+    return vault_client.get_secret(f"users/{vault_user_id}/{agent_scope}")
+
+
+async def _iter_user_connections(
+    vault_client,
+    vault_user_id: str,
+    scopes: tuple[str, ...],
+    requested_items: Optional[dict[str, frozenset[str]]],
+    include_values: bool = False,
+    owner=None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    now: Optional[datetime] = None,
+):
+    """Yield the keys stored in the given scopes under users/{vault_user_id} as
+    AgentConnectionResponse-shaped dicts.
+
+    All scope reads are started up front (at most VAULT_POOL_SIZE in flight, so the
+    fan-out never exceeds the Vault connection pool) and their rows are yielded in
+    scope order as each read completes. Pass ``semaphore`` to share that limit with
+    other listings, ``owner`` to fill in the user columns of each row and ``now`` to
+    stamp rows from several listings with one time.
+    """
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(VAULT_POOL_SIZE)
+    owner_fields = {"user_id": None, "user_name": None, "user_email": None}
+    if owner is not None:
+        owner_fields = {"user_id": vault_user_id, "user_name": owner.name, "user_email": owner.email}
+
+    async def read(agent_scope):
+        async with semaphore:
+            return await run_vault_call(_read_user_scope, vault_client, vault_user_id, agent_scope)
+
+    tasks = [asyncio.ensure_future(read(agent_scope)) for agent_scope in scopes]
+    # We don't have actual creation time from Vault; stamp every row with the same time
+    if now is None:
+        now = datetime.now()
     try:
-        # Validate input
-        if not connection.key_name or not connection.key_value:
-            raise HTTPException(status_code=400, detail="Key name and value are required")
-        
-        # Prepare connection data for vault
-        vault_connection = {
-            "name": connection.key_name,
-            "value": connection.key_value,
-            "agent_id": connection.agent_id,
-            "is_common": connection.is_common
-        }
-        
-        # Store in vault if enabled
-        vault_user_id = request.headers.get('x-ltai-vault-user') or user.id
-        if VAULT_CONFIG.value:
-            success = store_agent_connection_in_vault(vault_connection, vault_user_id)
-            if not success:
-                raise HTTPException(status_code=500, detail="Failed to store key in Vault")
-        
-        # Log the operation
-        logger.info(f"Stored key {connection.key_name} for user {vault_user_id} (agent: {connection.agent_id or 'common' if connection.is_common else 'default'})")
-        
-        # Generate a path-safe key ID using normalized underscore agent scope
-        scope_for_id = (
-            'common' if connection.is_common else (
-                'default' if not connection.agent_id else sanitize_agent_name(connection.agent_id)
+        for agent_scope, task in zip(scopes, tasks):
+            try:
+                data = await task
+            except Exception as e:
+                logger.debug("Failed to read agent scope {} for user {}: {}", agent_scope, vault_user_id, e)
+                continue
+            if not data:
+                continue
+            agent_scope_decoded = agent_scope.lower()
+            is_common, agent_id = _scope_fields(agent_scope_decoded)
+            for key_name, key_value in data.items():
+                # Use raw field name (no URL decoding)
+                decoded_key_name = key_name
+                if requested_items and not _is_requested_key(decoded_key_name, agent_scope_decoded, requested_items):
+                    continue
+                # Use lowercase scope for key_id for consistency
+                key_id = encode_key_id(vault_user_id, decoded_key_name, agent_scope_decoded)
+                # Rows are server-built, so they skip AgentConnectionResponse entirely
+                yield {
+                    "key_id": key_id,
+                    "key_name": decoded_key_name,
+                    "agent_id": agent_id,
+                    "is_common": is_common,
+                    "key_value": key_value if include_values else None,
+                    "created_at": now,
+                    **owner_fields
+                }
+    finally:
+        # Stop outstanding reads if the client went away mid-stream
+        for task in tasks:
+            task.cancel()
+
+
+async def _collect_user_connections(
+    vault_client, owner, user_id: str, semaphore: asyncio.Semaphore, now: datetime, recache: bool = False
+) -> Optional[list]:
+    """Return every key of one user, or None if their scopes cannot be listed."""
+    try:
+        async with semaphore:
+            scopes = await _get_user_scopes(user_id, recache=recache)
+        return [
+            row async for row in _iter_user_connections(
+                vault_client, user_id, scopes, None, owner=owner, semaphore=semaphore, now=now
             )
-        )
-        # Use sanitized key name in key_id for consistency with stored field names
-        key_id = f"{vault_user_id}_{sanitize_key_field(connection.key_name)}_{scope_for_id}"
-        
-        return AgentConnectionResponse(
-            key_id=key_id,
-            key_name=connection.key_name,
-            agent_id=connection.agent_id,
-            is_common=connection.is_common,
-            created_at=datetime.now()
-        )
-        
-    except HTTPException:
-        raise
+        ]
     except Exception as e:
-        logger.error(f"Error creating agent connection: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+        # Users without secrets list as empty, so this is a real failure; skip them
+        logger.warning("Could not list agent connections for user {}: {}", user_id, e)
+        return None
 
 
-@router.get("/", response_model=List[AgentConnectionResponse])
-async def list_agent_connections(request: Request, user=Depends(get_verified_user)):
-    """List keys for a user."""
+async def _iter_all_user_connections(vault_client, all_users: dict, user_ids: List[str], recache: bool = False):
+    """Yield the keys of the given users, one user at a time as their listings complete."""
+    # One limit for every LIST and read issued below, sized to the Vault pool
+    semaphore = asyncio.Semaphore(VAULT_POOL_SIZE)
+    now = datetime.now()
+
+    tasks = [
+        asyncio.ensure_future(
+            _collect_user_connections(vault_client, all_users[user_id], user_id, semaphore, now, recache=recache)
+        )
+        for user_id in user_ids
+    ]
     try:
-        connections = []
-        
-        if VAULT_CONFIG.value:
-            # Get Vault client
-            vault_client = get_vault_client()
-            if vault_client and vault_client.connect():
-                try:
-                    # Determine target vault user and requested keys
-                    vault_user_id = request.headers.get('x-ltai-vault-user') or user.id
-                    raw_keys = request.headers.get('x-ltai-vault-keys')
-                    requested_items = _parse_requested_items(raw_keys)
-
-                    # List agent scopes under users/{vault_user_id}/ (each key is an agent_name)
-                    user_path = f"users/{vault_user_id}"
-                    response = vault_client.client.secrets.kv.v1.list_secrets(
-                        path=user_path,
-                        mount_point=vault_client.mount_path
-                    )
-                    if response and 'data' in response and 'keys' in response['data']:
-                        for agent_scope in response['data']['keys']:
-                            # Remove trailing slash if any
-                            agent_scope = agent_scope[:-1] if agent_scope.endswith('/') else agent_scope
-                            agent_scope_decoded = agent_scope.lower()
-                            # Read secret at users/{user_id}/{agent_scope} to get fields (use original casing from Vault)
-                            secret_path = f"users/{vault_user_id}/{agent_scope}"
-                            secret = vault_client.client.secrets.kv.v1.read_secret(
-                                path=secret_path,
-                                mount_point=vault_client.mount_path
-                            )
-                            data = secret.get('data') if secret else None
-                            if data:
-                                for key_name in data.keys():
-                                    # Use raw field name (no URL decoding)
-                                    decoded_key_name = key_name
-                                    if requested_items and not _is_requested_key(decoded_key_name, agent_scope_decoded, requested_items):
-                                        continue
-                                    is_common = agent_scope_decoded == "common"
-                                    agent_id = None if agent_scope_decoded in ["common", "default"] else agent_scope_decoded
-                                    # Use lowercase scope for key_id for consistency
-                                    key_id = f"{vault_user_id}_{decoded_key_name}_{agent_scope_decoded}"
-                                    connections.append(AgentConnectionResponse(
-                                        key_id=key_id,
-                                        key_name=decoded_key_name,
-                                        agent_id=agent_id,
-                                        is_common=is_common,
-                                        created_at=datetime.now()  # We don't have actual creation time from Vault
-                                    ))
-                except Exception as e:
-                    # If listing fails (e.g., path doesn't exist), just return empty list
-                    logger.debug(f"No agent connections found for user {user.id}: {str(e)}")
-        
-        logger.info(f"Listed {len(connections)} agent connections for user {user.id}")
-        
-        return connections
-        
-    except Exception as e:
-        logger.error(f"Error listing agent connections: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+        for next_rows in asyncio.as_completed(tasks):
+            for row in await next_rows or ():
+                yield row
+    finally:
+        # Stop outstanding listings if the client went away mid-stream
+        for task in tasks:
+            task.cancel()
+
+
+async def _page_all_user_connections(
+    vault_client, all_users: dict, user_ids: List[str], limit: int, recache: bool = False
+) -> tuple[list, Optional[str], int]:
+    """Collect the keys of user_ids (sorted) until at least ``limit`` rows are gathered.
+
+    Users are scheduled ``limit`` at a time and consumed in order, so a page always ends
+    on a user boundary and its last user id is a stable cursor for the next page.
+    Returns (rows, next_cursor, failed), where next_cursor is None on the last page and
+    failed counts the users of the page whose keys could not be listed.
+    """
+    semaphore = asyncio.Semaphore(VAULT_POOL_SIZE)
+    now = datetime.now()
+    rows = []
+    failed = 0
+    for start in range(0, len(user_ids), limit):
+        chunk = user_ids[start:start + limit]
+        tasks = [
+            asyncio.ensure_future(
+                _collect_user_connections(vault_client, all_users[user_id], user_id, semaphore, now, recache=recache)
+            )
+            for user_id in chunk
+        ]
+        try:
+            for offset, task in enumerate(tasks):
+                user_rows = await task
+                if user_rows is None:
+                    failed += 1
+                    continue
+                rows.extend(user_rows)
+                if len(rows) >= limit:
+                    last = start + offset
+                    return rows, (user_ids[last] if last + 1 < len(user_ids) else None), failed
+        finally:
+            # Users past the end of the page are not needed
+            for task in tasks:
+                task.cancel()
+    return rows, None, failed
+
+
+async def _stream_json_array(rows, on_done=None):
+    """Serialize rows into a JSON array one item at a time; on_done receives the row count."""
+    count = 0
+    yield b"["
+    async for row in rows:
+        yield (b"," if count else b"") + orjson.dumps(row)
+        count += 1
+    yield b"]"
+    if on_done is not None:
+        on_done(count)
+
+
+@router.get("/", response_model=List[AgentConnectionResponse])
+async def list_agent_connections(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    user: VerifiedUser,
+    values: bool = False,
+    recache: bool = False
+):
+    """List keys for a user. Pass ``values=true`` to include the secret values and
+    ``recache=true`` to bypass the cached scope list.
+
+    The JSON array is streamed as the per-scope Vault reads complete.
+    """
+    if VAULT_CONFIG.value:
+        # Get Vault client
+        vault_client = get_vault_client()
+        if vault_client:
+            # Determine target vault user and requested keys
+            vault_user_id = request.headers.get('x-ltai-vault-user') or user.id
+            if values:
+                _authorize(user, vault_user_id)
+            try:
+                raw_keys = request.headers.get('x-ltai-vault-keys')
+                requested_items = _parse_requested_items(raw_keys)
+                scopes = await _get_user_scopes(vault_user_id, recache=recache)
+                if requested_items:
+                    # Only read the scopes the header asks for. The (cached) LIST is still
+                    # needed because stored agent scopes keep their case and the header's don't.
+                    scopes = tuple(scope for scope in scopes if scope.lower() in requested_items)
+            except Exception as e:
+                # If listing fails (e.g., path doesn't exist), just return empty list
+                logger.debug("No agent connections found for user {}: {}", user.id, e)
+                scopes = ()
+
+            if scopes:
+                rows = _iter_user_connections(
+                    vault_client, vault_user_id, scopes, requested_items, include_values=values
+                )
+                return StreamingResponse(
+                    _stream_json_array(
+                        rows, lambda count: _log_info("Listed {} agent connections for user {}", count, user.id)
+                    ),
+                    media_type="application/json"
+                )
+    
+    background_tasks.add_task(_log_info, "Listed 0 agent connections for user {}", user.id)
+    
+    return []
+
+
+def _index_users(user_ids: Optional[List[str]] = None) -> dict:
+    """Load users from the database keyed by id (blocking); every user unless user_ids is given."""
+    if user_ids is not None:
+        return {u.id: u for u in Users.get_users_by_user_ids(user_ids)} if user_ids else {}
+
+    # Get all user information once from the database.
+    # Users.get_users() returns a dict {"users": [...], "total": N}
+    users_result = Users.get_users()
+    user_list = users_result.get("users", []) if isinstance(users_result, dict) else []
+    
+    # Debug: Log the type and content of user_list
+    logger.debug("User list type: {}, length: {}", type(user_list), len(user_list))
+    if user_list:
+        logger.debug("First user item type: {}, value: {}", type(user_list[0]), user_list[0])
+    
+    # Handle potential serialization issues - ensure we have proper UserModel objects
+    all_users = {}
+    for u in user_list:
+        try:
+            if hasattr(u, 'id'):
+                all_users[u.id] = u
+            else:
+                # If u is a string (user_id), create a minimal user object
+                logger.warning("Expected UserModel object but got {}: {}", type(u), u)
+                if isinstance(u, str):
+                    # Create a minimal user-like object with just the id
+                    class MinimalUser:
+                        def __init__(self, user_id):
+                            self.id = user_id
+                            self.name = None
+                            self.email = None
+                    all_users[u] = MinimalUser(u)
+        except Exception as e:
+            logger.error("Error processing user item {}: {}", u, e)
+            continue
+
+    return all_users
+
+
+async def _get_users_indexed(user_ids: Optional[List[str]] = None, recache: bool = False) -> dict:
+    """Return users keyed by id (see _index_users), reusing the result for a few seconds."""
+    cache_key = tuple(user_ids) if user_ids is not None else None
+    if not recache:
+        all_users = _USERS_CACHE.get(cache_key)
+        if all_users is not None:
+            return all_users
+    all_users = await asyncio.to_thread(_index_users, user_ids)
+    _USERS_CACHE.set(cache_key, all_users)
+    return all_users
 
 
 @router.get("/admin/all", response_model=List[AgentConnectionResponse])
-async def list_all_agent_connections(user=Depends(get_admin_user)):
-    """List all agent connections from all users (admin only)."""
-    try:
-        connections = []
+async def list_all_agent_connections(
+    background_tasks: BackgroundTasks,
+    user: AdminUser,
+    recache: bool = False,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    """List all agent connections from all users (admin only).
 
-        if VAULT_CONFIG.value:
-            # Get Vault client
-            vault_client = get_vault_client()
-            if vault_client and vault_client.connect():
+    The JSON array is streamed user by user as each user's listing completes. With
+    ``limit`` only one page is returned: whole users in id order, starting after
+    ``cursor``, until at least ``limit`` rows are collected. The cursor for the next
+    page is sent in the X-Next-Cursor header, and the number of users on the page whose
+    keys could not be listed in X-Failed-Users. ``cursor`` requires ``limit``.
+    """
+    if cursor is not None and limit is None:
+        raise HTTPException(status_code=400, detail="cursor requires limit")
+
+    if VAULT_CONFIG.value:
+        # Get Vault client
+        vault_client = get_vault_client()
+        if vault_client:
+            try:
+                # One LIST on the "users" root tells us which users have secrets at all, so
+                # only those are loaded from the database. Not every Vault policy allows
+                # listing the root; fall back to checking every known user.
                 try:
-                    # Get all user information once from the database.
-                    # Users.get_users() returns a dict {"users": [...], "total": N}
-                    users_result = Users.get_users()
-                    user_list = users_result.get("users", []) if isinstance(users_result, dict) else []
-                    
-                    # Debug: Log the type and content of user_list
-                    logger.debug(f"User list type: {type(user_list)}, length: {len(user_list)}")
-                    if user_list:
-                        logger.debug(f"First user item type: {type(user_list[0])}, value: {user_list[0]}")
-                    
-                    # Handle potential serialization issues - ensure we have proper UserModel objects
-                    all_users = {}
-                    for u in user_list:
-                        try:
-                            if hasattr(u, 'id'):
-                                all_users[u.id] = u
-                            else:
-                                # If u is a string (user_id), create a minimal user object
-                                logger.warning(f"Expected UserModel object but got {type(u)}: {u}")
-                                if isinstance(u, str):
-                                    # Create a minimal user-like object with just the id
-                                    class MinimalUser:
-                                        def __init__(self, user_id):
-                                            self.id = user_id
-                                            self.name = None
-                                            self.email = None
-                                    all_users[u] = MinimalUser(u)
-                        except Exception as e:
-                            logger.error(f"Error processing user item {u}: {str(e)}")
-                            continue
-
-                    # Iterate over known users instead of listing the Vault root "users" path,
-                    # which may not be allowed by all Vault policies.
-                    for user_id, user_info in all_users.items():
-                        try:
-                            # List agent scopes for this user
-                            user_response = vault_client.client.secrets.kv.v1.list_secrets(
-                                path=f"users/{user_id}",
-                                mount_point=vault_client.mount_path
-                            )
-
-                            if user_response and 'data' in user_response and 'keys' in user_response['data']:
-                                for agent_scope in user_response['data']['keys']:
-                                    agent_scope = agent_scope[:-1] if agent_scope.endswith('/') else agent_scope
-                                    agent_scope_decoded = agent_scope.lower()
-                                    secret_path = f"users/{user_id}/{agent_scope}"
-                                    secret = vault_client.client.secrets.kv.v1.read_secret(
-                                        path=secret_path,
-                                        mount_point=vault_client.mount_path
-                                    )
-                                    data = secret.get('data') if secret else None
-                                    if data:
-                                        for key_name in data.keys():
-                                            decoded_key_name = key_name
-                                            is_common = agent_scope_decoded == "common"
-                                            agent_id = None if agent_scope_decoded in ["common", "default"] else agent_scope_decoded
-                                            # Use lowercase scope for key_id for consistency
-                                            key_id = f"{user_id}_{decoded_key_name}_{agent_scope_decoded}"
-                                            connections.append(AgentConnectionResponse(
-                                                key_id=key_id,
-                                                key_name=decoded_key_name,
-                                                agent_id=agent_id,
-                                                is_common=is_common,
-                                                created_at=datetime.now(),  # We don't have actual creation time from Vault
-                                                user_id=user_id,
-                                                user_name=user_info.name if user_info else None,
-                                                user_email=user_info.email if user_info else None
-                                            ))
-                        except Exception as e:
-                            # If listing fails for a user, just skip them
-                            logger.debug(f"No agent connections found for user {user_id}: {str(e)}")
-
+                    vault_user_ids = sorted(await run_vault_call(_list_vault_user_ids, vault_client))
                 except Exception as e:
-                    # If listing fails, just return empty list
-                    logger.debug(f"No agent connections found: {str(e)}")
+                    logger.debug("Cannot list Vault users root, checking every user: {}", e)
+                    vault_user_ids = None
+
+                # User information from the database (or the short-lived cache)
+                all_users = await _get_users_indexed(vault_user_ids, recache=recache)
+                target_ids = list(all_users)
+
+                if limit is not None:
+                    target_ids = sorted(target_ids)
+                    if cursor:
+                        target_ids = target_ids[bisect.bisect_right(target_ids, cursor):]
+                    rows, next_cursor, failed = await _page_all_user_connections(
+                        vault_client, all_users, target_ids, limit, recache=recache
+                    )
+                    background_tasks.add_task(
+                        _log_info, "Admin listed {} agent connections from all users", len(rows)
+                    )
+                    headers = {"X-Failed-Users": str(failed)} if failed else {}
+                    if next_cursor:
+                        headers["X-Next-Cursor"] = next_cursor
+                    return ORJSONResponse(rows, headers=headers or None)
+
+                if target_ids:
+                    rows = _iter_all_user_connections(vault_client, all_users, target_ids, recache=recache)
+                    return StreamingResponse(
+                        _stream_json_array(
+                            rows, lambda count: _log_info("Admin listed {} agent connections from all users", count)
+                        ),
+                        media_type="application/json"
+                    )
 
-        logger.info(f"Admin listed {len(connections)} agent connections from all users")
+            except Exception as e:
+                # If listing fails, just return empty list
+                logger.debug("No agent connections found: {}", e)
 
-        return connections
+    background_tasks.add_task(_log_info, "Admin listed 0 agent connections from all users")
 
-    except Exception as e:
-        logger.error(f"Error listing all agent connections: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    return []
+
+
+def _etag(location: tuple[str, str], value: str) -> str:
+    """Strong ETag for a stored value.
+
+    Keyed with WEBUI_SECRET_KEY so the header cannot be used to brute-force the secret offline.
+    """
+    digest = hmac.new(
+        WEBUI_SECRET_KEY.encode(), "\0".join((*location, value)).encode(), hashlib.sha256
+    ).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (a list of tags or "*") against etag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(",")
+    )
+
+
+async def _read_agent_connection(key: KeyIdContext) -> tuple[str, str]:
+    """Fetch the value behind a resolved key_id (possibly from the Vault scope cache).
+
+    Returns (value, etag).
+    """
+    if not VAULT_CONFIG.value:
+        raise HTTPException(status_code=503, detail="Vault integration not enabled")
+
+    value = await _vault_call(
+        get_agent_connection_from_vault,
+        name=key.key_name,
+        user_id=key.vault_user_id,
+        is_common=key.is_common,
+        agent_id=key.agent_id
+    )
+    if value is None:
+        raise HTTPException(status_code=404, detail="Key not found")
+
+    location = _secret_location(key.vault_user_id, key.key_name, key.agent_id, key.is_common)
+    return value, _etag(location, value)
+
+
+def _connection_payload(key: KeyIdContext, value: str) -> dict:
+    return {
+        "key_id": key.key_id,
+        "key_name": key.key_name,
+        "key_value": value,
+        "agent_id": key.agent_id,
+        "is_common": key.is_common
+    }
 
 
 @router.get("/{key_id:path}", response_model=dict)
 async def get_agent_connection(
-    key_id: str,
+    key: KeyIdCtx,
     request: Request,
-    user=Depends(get_verified_user)
+    response: Response
 ):
-    """Get a specific agent connection by key_id."""
-    try:
-        # Parse key_id to extract components
-        # Format: user_id_key_name_agent_or_scope (key_name can contain underscores)
-        first_sep = key_id.find('_')
-        last_sep = key_id.rfind('_')
-        if first_sep == -1 or last_sep == -1 or last_sep <= first_sep:
-            raise HTTPException(status_code=400, detail="Invalid key_id format")
-        user_id_from_key = key_id[:first_sep]
-        agent_scope = key_id[last_sep+1:]
-        agent_scope_decoded = agent_scope
-        key_name = key_id[first_sep+1:last_sep]
-        if not key_name:
-            raise HTTPException(status_code=400, detail="Invalid key_id format")
-        
-        # Check if user has access to this key
-        if user_id_from_key != user.id and user.role != "admin":
-            raise HTTPException(status_code=403, detail="Access denied")
-        
-        # Determine if it's a common key
-        is_common = agent_scope_decoded == "common"
-        agent_id = None if is_common or agent_scope_decoded == "default" else agent_scope_decoded
-        
-        # Get from vault
-        if VAULT_CONFIG.value:
-            value = get_agent_connection_from_vault(
-                name=key_name,
-                user_id=request.headers.get('x-ltai-vault-user') or user_id_from_key,
-                is_common=is_common,
-                agent_id=agent_id
-            )
-            
-            if value is None:
-                raise HTTPException(status_code=404, detail="Key not found")
-            
-            return {
-                "key_id": key_id,
-                "key_name": key_name,
-                "key_value": value,
-                "agent_id": agent_id,
-                "is_common": is_common
-            }
-        else:
-            raise HTTPException(status_code=503, detail="Vault integration not enabled")
-            
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error getting agent connection: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    """Get a specific agent connection by key_id.
+
+    Honors If-None-Match with a 304 so pollers do not re-download unchanged values.
+    """
+    value, etag = await _read_agent_connection(key)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return _connection_payload(key, value)
+
+
+@router.head("/{key_id:path}")
+async def head_agent_connection(
+    key: KeyIdCtx,
+    request: Request
+):
+    """Check that a key exists without returning its value."""
+    _, etag = await _read_agent_connection(key)
+    status_code = 304 if _etag_matches(request.headers.get("if-none-match"), etag) else 200
+    return Response(status_code=status_code, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+
+@router.post("/batch", response_model=dict)
+async def get_agent_connections_batch(
+    batch: AgentConnectionBatchGet,
+    request: Request,
+    user: VerifiedUser
+):
+    """Get up to 100 agent connections in one call, keyed by key_id.
+
+    Keys are fetched concurrently. A key that cannot be read maps to its error
+    (status_code and detail) instead of failing the whole batch.
+    """
+    if not VAULT_CONFIG.value:
+        raise HTTPException(status_code=503, detail="Vault integration not enabled")
+
+    key_ids = list(dict.fromkeys(batch.key_ids))
+    semaphore = asyncio.Semaphore(VAULT_POOL_SIZE)
+
+    async def read(key_id):
+        key = _key_id_context(key_id, request, user)
+        async with semaphore:
+            value, _ = await _read_agent_connection(key)
+        return _connection_payload(key, value)
+
+    results = await asyncio.gather(*(read(key_id) for key_id in key_ids), return_exceptions=True)
+
+    connections = {}
+    for key_id, result in zip(key_ids, results):
+        if isinstance(result, HTTPException):
+            connections[key_id] = {"status_code": result.status_code, "detail": result.detail}
+            continue
+        if isinstance(result, BaseException):
+            raise result
+        connections[key_id] = result
+    return connections
 
 
 @router.put("/{key_id:path}", response_model=AgentConnectionResponse)
 async def update_agent_connection(
-    key_id: str,
+    key: KeyIdCtx,
     connection: AgentConnectionUpdate,
-    request: Request,
-    user=Depends(get_verified_user)
+    background_tasks: BackgroundTasks
 ):
     """Update an existing agent connection."""
-    try:
-        # Parse key_id to extract components
-        first_sep = key_id.find('_')
-        last_sep = key_id.rfind('_')
-        if first_sep == -1 or last_sep == -1 or last_sep <= first_sep:
-            raise HTTPException(status_code=400, detail="Invalid key_id format")
-        user_id_from_key = key_id[:first_sep]
-        agent_scope = key_id[last_sep+1:]
-        agent_scope_decoded = agent_scope
-        current_key_name = key_id[first_sep+1:last_sep]
-        if not current_key_name:
-            raise HTTPException(status_code=400, detail="Invalid key_id format")
-        
-        # Check if user has access to this key
-        if user_id_from_key != user.id and user.role != "admin":
-            raise HTTPException(status_code=403, detail="Access denied")
-        
-        # Get current values if not provided in update
-        is_common = agent_scope_decoded == "common"
-        agent_id = None if is_common or agent_scope_decoded == "default" else agent_scope_decoded
-        
-        # Get current value if not updating it
-        current_value = None
-        if not connection.key_value and VAULT_CONFIG.value:
-            current_value = get_agent_connection_from_vault(
-                name=current_key_name,
-                user_id=request.headers.get('x-ltai-vault-user') or user_id_from_key,
-                is_common=is_common,
-                agent_id=agent_id
-            )
-            if current_value is None:
-                raise HTTPException(status_code=404, detail="Key not found")
-        
-        # Use provided values or current ones
-        new_key_name = connection.key_name or current_key_name
-        new_key_value = connection.key_value or current_value
-        new_agent_id = connection.agent_id if connection.agent_id is not None else agent_id
-        new_is_common = connection.is_common if connection.is_common is not None else is_common
-        
-        # No strict validation on key names; allow arbitrary strings
-
-        # If key name or scope changed, delete old key first
-        if (new_key_name != current_key_name or 
-            new_agent_id != agent_id or 
-            new_is_common != is_common):
-            
-            if VAULT_CONFIG.value:
-                delete_agent_connection_from_vault(
-                    name=current_key_name,
-                    user_id=request.headers.get('x-ltai-vault-user') or user_id_from_key,
-                    is_common=is_common,
-                    agent_id=agent_id
-                )
-        
-        # Store updated connection
+    key_id, user_id_from_key, current_key_name = key.key_id, key.owner_id, key.key_name
+    is_common, agent_id, vault_user_id = key.is_common, key.agent_id, key.vault_user_id
+    
+    # Read the toggle once so the whole update sees the same setting
+    vault_enabled = VAULT_CONFIG.value
+
+    # Use provided name/scope or current ones
+    new_key_name = connection.key_name or current_key_name
+    new_agent_id = connection.agent_id if connection.agent_id is not None else agent_id
+    new_is_common = connection.is_common if connection.is_common is not None else is_common
+    old_location = _secret_location(vault_user_id, current_key_name, agent_id, is_common)
+    new_location = _secret_location(vault_user_id, new_key_name, new_agent_id, new_is_common)
+
+    # Forms resubmitted unchanged (no new value, same stored location) need no Vault I/O
+    if not connection.key_value and old_location == new_location:
+        return AgentConnectionResponse.model_construct(
+            key_id=key_id,
+            key_name=current_key_name,
+            agent_id=agent_id,
+            is_common=is_common,
+            created_at=datetime.now()
+        )
+
+    # No strict validation on key names beyond non-empty; allow arbitrary strings
+
+    if vault_enabled:
+        # Without a new value the current one is carried over; the Vault helper reads it
+        # under the same path locks as its writes, so concurrent updates cannot be lost
         vault_connection = {
             "name": new_key_name,
-            "value": new_key_value,
+            "value": connection.key_value or None,
             "agent_id": new_agent_id,
             "is_common": new_is_common
         }
-        
-        if VAULT_CONFIG.value:
-            vault_user_id = request.headers.get('x-ltai-vault-user') or user_id_from_key
-            success = store_agent_connection_in_vault(vault_connection, vault_user_id)
-            if not success:
-                raise HTTPException(status_code=500, detail="Failed to update key in Vault")
-        
-        # Generate new key ID with encoded scope to be path-safe
-        new_scope_for_id = (
-            'common' if new_is_common else (
-                'default' if not new_agent_id else sanitize_agent_name(new_agent_id)
-            )
+        stored = await _vault_call(
+            move_agent_connection_in_vault,
+            name=current_key_name,
+            user_id=vault_user_id,
+            connection=vault_connection,
+            is_common=is_common,
+            agent_id=agent_id
         )
-        new_key_id = f"{user_id_from_key}_{sanitize_key_field(new_key_name)}_{new_scope_for_id}"
-        
-        logger.info(f"Updated key {current_key_name} -> {new_key_name} for user {user_id_from_key}")
-        
-        return AgentConnectionResponse(
-            key_id=new_key_id,
-            key_name=new_key_name,
-            agent_id=new_agent_id,
-            is_common=new_is_common,
-            created_at=datetime.now()
-        )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error updating agent connection: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+        if stored is None:
+            raise HTTPException(status_code=404, detail="Key not found")
+        if not stored:
+            raise HTTPException(status_code=500, detail="Failed to update key in Vault")
+    
+    new_key_id = _make_key_id(user_id_from_key, new_key_name, new_agent_id, new_is_common)
+    
+    background_tasks.add_task(
+        _log_info, "Updated key {} -> {} for user {}", current_key_name, new_key_name, user_id_from_key
+    )
+    
+    return AgentConnectionResponse.model_construct(
+        key_id=new_key_id,
+        key_name=new_key_name,
+        agent_id=new_agent_id,
+        is_common=new_is_common,
+        created_at=datetime.now()
+    )
 
 
 @router.delete("/{key_id:path}", response_model=dict)
 async def delete_agent_connection(
-    key_id: str,
-    request: Request,
-    user=Depends(get_verified_user)
+    key: KeyIdCtx,
+    background_tasks: BackgroundTasks
 ):
     """Delete a key from Vault."""
-    try:
-        # Parse key_id to extract components
-        first_sep = key_id.find('_')
-        last_sep = key_id.rfind('_')
-        if first_sep == -1 or last_sep == -1 or last_sep <= first_sep:
-            raise HTTPException(status_code=400, detail="Invalid key_id format")
-        user_id_from_key = key_id[:first_sep]
-        agent_scope = key_id[last_sep+1:]
-        agent_scope_decoded = agent_scope
-        key_name = key_id[first_sep+1:last_sep]
-        if not key_name:
-            raise HTTPException(status_code=400, detail="Invalid key_id format")
-        
-        # Check if user has access to this key
-        if user_id_from_key != user.id and user.role != "admin":
-            raise HTTPException(status_code=403, detail="Access denied")
-        
-        # Determine scope
-        is_common = agent_scope_decoded == "common"
-        agent_id = None if is_common or agent_scope_decoded == "default" else agent_scope_decoded
-        
-        # Delete from vault
-        if VAULT_CONFIG.value:
-            success = delete_agent_connection_from_vault(
-                name=key_name,
-                user_id=request.headers.get('x-ltai-vault-user') or user_id_from_key,
-                is_common=is_common,
-                agent_id=agent_id
-            )
-            
-            if not success:
-                raise HTTPException(status_code=500, detail="Failed to delete key from Vault")
-        
-        logger.info(f"Deleted key {key_name} for user {user_id_from_key} (agent: {agent_id or 'common' if is_common else 'default'})")
-        
-        return {"status": "success"}
+    key_name, is_common, agent_id, vault_user_id = key.key_name, key.is_common, key.agent_id, key.vault_user_id
+    
+    # Delete from vault
+    if VAULT_CONFIG.value:
+        success = await _vault_call(
+            delete_agent_connection_from_vault,
+            name=key_name,
+            user_id=vault_user_id,
+            is_common=is_common,
+            agent_id=agent_id
+        )
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error deleting agent connection: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error") 
\ No newline at end of file
+        if not success:
+            raise HTTPException(status_code=500, detail="Failed to delete key from Vault")
+    
+    background_tasks.add_task(
+        _log_info, "Deleted key {} for user {} (scope: {})", key_name, key.owner_id, key.scope
+    )
+    
+    return {"status": "success"}
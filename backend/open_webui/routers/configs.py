@@ -1,6 +1,8 @@
+import asyncio
 import logging
 from fastapi import APIRouter, Depends, Request, HTTPException
-from pydantic import BaseModel, ConfigDict
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, TypeAdapter, field_validator
 import aiohttp
 
 from typing import Optional, List, Dict, Any
@@ -10,7 +12,7 @@ from open_webui.config import get_config, save_config
 from open_webui.config import BannerModel
 from open_webui.config import ENABLE_VAULT_INTEGRATION, VAULT_URL, VAULT_TOKEN, VAULT_MOUNT_PATH, VAULT_VERSION, VAULT_TIMEOUT, VAULT_VERIFY_SSL
 
-from open_webui.utils.vault import store_agent_connection_in_vault, get_agent_connection_from_vault, delete_agent_connection_from_vault, sanitize_agent_name, sanitize_key_field
+from open_webui.utils.vault import store_agent_connections_in_vault, get_agent_connection_scope_from_vault, format_secret_key, sanitize_key_field, run_vault_call
 from loguru import logger
 from pydantic import BaseModel, ConfigDict
 
@@ -33,35 +35,12 @@ from open_webui.utils.oauth import (
 from mcp.shared.auth import OAuthMetadata
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 
-def _parse_requested_keys(raw_keys: Optional[str]) -> Optional[set[tuple[str, str]]]:
-    """Parse X-LTAI-Vault-Keys header into a set of (scope, key_name) pairs.
-
-    Supported items only:
-      - "COMMON/<key_name>"
-      - "<agent_scope>/<key_name>" where agent_scope is underscore-normalized
-
-    Returns a set of tuples: (scope, key_name) where scope is "common" for COMMON, or the agent scope as-is.
-    Items without a '/' are ignored. Key names are SANITIZED (slashes/backslashes -> underscore)
-    to match stored field names in Vault.
-    """
-    if not raw_keys:
-        return None
-    items = [k.strip() for k in raw_keys.split(',') if k.strip()]
-    parsed: set[tuple[str, str]] = set()
-    for item in items:
-        if '/' in item:
-            scope_part, key_part = item.split('/', 1)
-            scope = 'common' if scope_part == 'COMMON' else scope_part
-            parsed.add((scope, sanitize_key_field(key_part)))
-    return parsed if parsed else None
-
-
 ############################
 # ImportConfig
 ############################
@@ -82,9 +61,9 @@ async def import_config(form_data: ImportConfigForm, user=Depends(get_admin_user
 ############################
 
 
-@router.get("/export", response_model=dict)
+@router.get("/export")
 async def export_config(user=Depends(get_admin_user)):
-    return get_config()
+    return ORJSONResponse(get_config())
 
 
 ############################
@@ -99,9 +78,10 @@ class ConnectionsConfigForm(BaseModel):
 
 @router.get("/connections", response_model=ConnectionsConfigForm)
 async def get_connections_config(request: Request, user=Depends(get_admin_user)):
+    config = request.app.state.config
     return {
-        "ENABLE_DIRECT_CONNECTIONS": request.app.state.config.ENABLE_DIRECT_CONNECTIONS,
-        "ENABLE_BASE_MODELS_CACHE": request.app.state.config.ENABLE_BASE_MODELS_CACHE,
+        "ENABLE_DIRECT_CONNECTIONS": config.ENABLE_DIRECT_CONNECTIONS,
+        "ENABLE_BASE_MODELS_CACHE": config.ENABLE_BASE_MODELS_CACHE,
     }
 
 
@@ -111,16 +91,13 @@ async def set_connections_config(
     form_data: ConnectionsConfigForm,
     user=Depends(get_admin_user),
 ):
-    request.app.state.config.ENABLE_DIRECT_CONNECTIONS = (
-        form_data.ENABLE_DIRECT_CONNECTIONS
-    )
-    request.app.state.config.ENABLE_BASE_MODELS_CACHE = (
-        form_data.ENABLE_BASE_MODELS_CACHE
-    )
+    config = request.app.state.config
+    config.ENABLE_DIRECT_CONNECTIONS = form_data.ENABLE_DIRECT_CONNECTIONS
+    config.ENABLE_BASE_MODELS_CACHE = form_data.ENABLE_BASE_MODELS_CACHE
 
     return {
-        "ENABLE_DIRECT_CONNECTIONS": request.app.state.config.ENABLE_DIRECT_CONNECTIONS,
-        "ENABLE_BASE_MODELS_CACHE": request.app.state.config.ENABLE_BASE_MODELS_CACHE,
+        "ENABLE_DIRECT_CONNECTIONS": config.ENABLE_DIRECT_CONNECTIONS,
+        "ENABLE_BASE_MODELS_CACHE": config.ENABLE_BASE_MODELS_CACHE,
     }
 
 
@@ -349,360 +326,158 @@ class AgentConnection(BaseModel):
     model_config = ConfigDict(extra="allow")
 
 
-class AgentConnectionsConfigForm(BaseModel):
-    AGENT_CONNECTIONS: List[AgentConnection] = []
+# Parses is_common the way a `bool` model field would ("false" -> False)
+_IS_COMMON = TypeAdapter(bool)
 
 
-@router.get("/agent_connections", response_model=AgentConnectionsConfigForm)
-async def get_agent_connections_config(request: Request, user=Depends(get_verified_user)):
-    # Admin users can see all connections
-    if user.role == "admin":
-        # Handle case where AGENT_CONNECTIONS might be a list instead of PersistentConfig
-        agent_connections = request.app.state.config.AGENT_CONNECTIONS
-        if hasattr(agent_connections, 'value'):
-            connections = agent_connections.value
-        else:
-            # If it's already a list, use it directly
-            connections = agent_connections if isinstance(agent_connections, list) else []
-        
-        # If Vault integration is enabled, fetch secrets from Vault
-        if ENABLE_VAULT_INTEGRATION.value:
-            updated_connections = []
-            for conn in connections:
-                # Try to get the value from Vault
-                vault_value = get_agent_connection_from_vault(
-                    name=conn.get("name"),
-                    user_id=user.id,
-                    is_common=conn.get("is_common", False),
-                    agent_id=conn.get("agent_id")
-                )
-                
-                # If found in Vault, use that value
-                if vault_value is not None:
-                    conn_copy = dict(conn)
-                    conn_copy["value"] = vault_value
-                    updated_connections.append(conn_copy)
-                else:
-                    updated_connections.append(conn)
-            
-            return {"AGENT_CONNECTIONS": updated_connections}
-        
-        return {"AGENT_CONNECTIONS": connections}
-    
-    # Regular users can only see common connections or ones associated with their agents
-    # Check if user has agents property
-    user_agents = getattr(user, 'agents', [])
-    
-    # Handle case where AGENT_CONNECTIONS might be a list instead of PersistentConfig
-    agent_connections = request.app.state.config.AGENT_CONNECTIONS
-    if hasattr(agent_connections, 'value'):
-        all_connections = agent_connections.value
-    else:
-        all_connections = agent_connections if isinstance(agent_connections, list) else []
-    
-    user_connections = [
-        conn for conn in all_connections
-        if conn.get("is_common", False) or (conn.get("agent_id") and conn.get("agent_id") in user_agents)
-    ]
-    
-    # If Vault integration is enabled, fetch secrets from Vault
-    if ENABLE_VAULT_INTEGRATION.value:
-        updated_connections = []
-        for conn in user_connections:
-            # Try to get the value from Vault
-            vault_value = get_agent_connection_from_vault(
-                name=conn.get("name"),
-                user_id=user.id,
-                is_common=conn.get("is_common", False),
-                agent_id=conn.get("agent_id")
-            )
-            
-            # If found in Vault, use that value
-            if vault_value is not None:
-                conn_copy = dict(conn)
-                conn_copy["value"] = vault_value
-                updated_connections.append(conn_copy)
-            else:
-                updated_connections.append(conn)
-        
-        return {"AGENT_CONNECTIONS": updated_connections}
-    
-    return {"AGENT_CONNECTIONS": user_connections}
-
+class AgentConnectionsConfigForm(BaseModel):
+    # Plain dicts: the write path stores and mutates them as-is, so only the
+    # fields it relies on are checked instead of building a model per entry.
+    AGENT_CONNECTIONS: List[dict] = []
 
-@router.post("/agent_connections", response_model=AgentConnectionsConfigForm)
-async def set_agent_connections_config(
-    request: Request,
-    form_data: AgentConnectionsConfigForm,
-    user=Depends(get_admin_user),
-):
-    connections = [connection.model_dump() for connection in form_data.AGENT_CONNECTIONS]
-    
-    # If Vault integration is enabled, store secrets in Vault
-    if ENABLE_VAULT_INTEGRATION.value:
+    @field_validator("AGENT_CONNECTIONS")
+    @classmethod
+    def check_agent_connections(cls, connections: List[dict]) -> List[dict]:
         for connection in connections:
-            # Store the secret in Vault
-            success = store_agent_connection_in_vault(connection, user.id)
-            
-            # If successfully stored in Vault, remove the value from the connection
-            # to avoid storing it in the database
-            if success:
-                # Keep a placeholder value to indicate it's stored in Vault
-                connection["value"] = "[STORED_IN_VAULT]"
-                logger.info(f"Stored agent connection {connection.get('name')} for user {user.id} in Vault")
-            else:
-                logger.error(f"Failed to store agent connection {connection.get('name')} for user {user.id} in Vault")
-    
-    # Update the PersistentConfig value (or set directly if it's a list)
-    agent_connections = request.app.state.config.AGENT_CONNECTIONS
-    if hasattr(agent_connections, 'value'):
-        agent_connections.value = connections
-    else:
-        # If it's not a PersistentConfig, set it directly
-        request.app.state.config.AGENT_CONNECTIONS = connections
-    
-    # Return the current value
-    if hasattr(request.app.state.config.AGENT_CONNECTIONS, 'value'):
-        return {"AGENT_CONNECTIONS": request.app.state.config.AGENT_CONNECTIONS.value}
-    else:
-        return {"AGENT_CONNECTIONS": request.app.state.config.AGENT_CONNECTIONS}
-
+            if not isinstance(connection.get("name"), str) or not isinstance(
+                connection.get("value"), str
+            ):
+                raise ValueError("Agent connections require string 'name' and 'value'")
+            agent_id = connection.setdefault("agent_id", None)
+            if agent_id is not None and not isinstance(agent_id, str):
+                raise ValueError("Agent connection 'agent_id' must be a string or null")
+            # A truthy string such as "false" would otherwise select the common scope
+            connection["is_common"] = _IS_COMMON.validate_python(connection.get("is_common", False))
+        return connections
 
-############################
-# Agent Connections Config
-############################
 
-class AgentConnection(BaseModel):
-    name: str
-    value: str
-    agent_id: Optional[str] = None
-    is_common: bool = False
-    
-    model_config = ConfigDict(extra="allow")
+# Value kept in the config for connections whose secret lives in Vault
+STORED_IN_VAULT = "[STORED_IN_VAULT]"
 
+# (connections list, common positions, {agent_id: positions}) for the last list indexed
+_agent_connections_index = (None, (), {})
 
-class AgentConnectionsConfigForm(BaseModel):
-    AGENT_CONNECTIONS: List[AgentConnection] = []
 
+def _index_agent_connections(connections: list) -> tuple[tuple, dict]:
+    """Positions of the common connections and of each agent's connections.
 
-@router.get("/agent_connections", response_model=AgentConnectionsConfigForm)
-async def get_agent_connections_config(request: Request, user=Depends(get_verified_user)):
-    # Admin users can see all connections
-    if user.role == "admin":
-        # Handle case where AGENT_CONNECTIONS might be a list instead of PersistentConfig
-        agent_connections = request.app.state.config.AGENT_CONNECTIONS
-        if hasattr(agent_connections, 'value'):
-            connections = agent_connections.value
-        else:
-            # If it's already a list, use it directly
-            connections = agent_connections if isinstance(agent_connections, list) else []
-        
-        # If Vault integration is enabled, fetch secrets from Vault
-        if ENABLE_VAULT_INTEGRATION.value:
-            updated_connections = []
-            for conn in connections:
-                # Try to get the value from Vault
-                vault_value = get_agent_connection_from_vault(
-                    name=conn.get("name"),
-                    user_id=user.id,
-                    is_common=conn.get("is_common", False),
-                    agent_id=conn.get("agent_id")
-                )
-                
-                # If found in Vault, use that value
-                if vault_value is not None:
-                    conn_copy = dict(conn)
-                    conn_copy["value"] = vault_value
-                    updated_connections.append(conn_copy)
-                else:
-                    updated_connections.append(conn)
-            
-            return {"AGENT_CONNECTIONS": updated_connections}
-        
-        return {"AGENT_CONNECTIONS": connections}
-    
-    # Regular users can only see common connections or ones associated with their agents
-    # Check if user has agents property
-    user_agents = getattr(user, 'agents', [])
-    
-    # Handle case where AGENT_CONNECTIONS might be a list instead of PersistentConfig
-    agent_connections = request.app.state.config.AGENT_CONNECTIONS
-    if hasattr(agent_connections, 'value'):
-        all_connections = agent_connections.value
+    The index is rebuilt only when the config holds a different list than last time;
+    saving the config always assigns a new one.
+    """
+    global _agent_connections_index
+    indexed, common_positions, positions_by_agent = _agent_connections_index
+    if indexed is not connections:
+        common, by_agent = [], {}
+        for position, conn in enumerate(connections):
+            if conn.get("is_common", False):
+                common.append(position)
+            elif conn.get("agent_id"):
+                by_agent.setdefault(conn.get("agent_id"), []).append(position)
+        common_positions, positions_by_agent = tuple(common), by_agent
+        _agent_connections_index = (connections, common_positions, positions_by_agent)
+    return common_positions, positions_by_agent
+
+
+def _get_agent_connections(config) -> list:
+    """Read AGENT_CONNECTIONS, which may be a PersistentConfig or a plain list."""
+    agent_connections = config.AGENT_CONNECTIONS
+    if hasattr(agent_connections, "value"):
+        return agent_connections.value
+    return agent_connections if isinstance(agent_connections, list) else []
+
+
+def _set_agent_connections(config, connections: list) -> None:
+    """Write AGENT_CONNECTIONS back in whichever shape the config holds it."""
+    agent_connections = config.AGENT_CONNECTIONS
+    if hasattr(agent_connections, "value"):
+        agent_connections.value = connections
     else:
-        all_connections = agent_connections if isinstance(agent_connections, list) else []
-    
-    user_connections = [
-        conn for conn in all_connections
-        if conn.get("is_common", False) or (conn.get("agent_id") and conn.get("agent_id") in user_agents)
-    ]
-    
-    # If Vault integration is enabled, fetch secrets from Vault
-    if ENABLE_VAULT_INTEGRATION.value:
-        updated_connections = []
-        for conn in user_connections:
-            # Try to get the value from Vault
-            vault_value = get_agent_connection_from_vault(
-                name=conn.get("name"),
-                user_id=user.id,
-                is_common=conn.get("is_common", False),
-                agent_id=conn.get("agent_id")
-            )
-            
-            # If found in Vault, use that value
-            if vault_value is not None:
-                conn_copy = dict(conn)
-                conn_copy["value"] = vault_value
-                updated_connections.append(conn_copy)
-            else:
-                updated_connections.append(conn)
-        
-        return {"AGENT_CONNECTIONS": updated_connections}
-    
-    return {"AGENT_CONNECTIONS": user_connections}
+        config.AGENT_CONNECTIONS = connections
 
 
-@router.post("/agent_connections", response_model=AgentConnectionsConfigForm)
-async def set_agent_connections_config(
-    request: Request,
-    form_data: AgentConnectionsConfigForm,
-    user=Depends(get_admin_user),
-):
-    connections = [connection.model_dump() for connection in form_data.AGENT_CONNECTIONS]
-    
-    # If Vault integration is enabled, store secrets in Vault
-    if ENABLE_VAULT_INTEGRATION.value:
-        for connection in connections:
-            # Store the secret in Vault
-            success = store_agent_connection_in_vault(connection, user.id)
-            
-            # If successfully stored in Vault, remove the value from the connection
-            # to avoid storing it in the database
-            if success:
-                # Keep a placeholder value to indicate it's stored in Vault
-                connection["value"] = "[STORED_IN_VAULT]"
-                logger.info(f"Stored agent connection {connection.get('name')} for user {user.id} in Vault")
-            else:
-                logger.error(f"Failed to store agent connection {connection.get('name')} for user {user.id} in Vault")
-    
-    # Update the PersistentConfig value (or set directly if it's a list)
-    agent_connections = request.app.state.config.AGENT_CONNECTIONS
-    if hasattr(agent_connections, 'value'):
-        agent_connections.value = connections
-    else:
-        # If it's not a PersistentConfig, set it directly
-        request.app.state.config.AGENT_CONNECTIONS = connections
+async def _overlay_vault_values(connections: list, user_id: str) -> list:
+    """Return the connections with each value replaced by the one stored in Vault, if any.
 
-    # Return the current value
-    if hasattr(request.app.state.config.AGENT_CONNECTIONS, 'value'):
-        return {"AGENT_CONNECTIONS": request.app.state.config.AGENT_CONNECTIONS.value}
-    else:
-        return {"AGENT_CONNECTIONS": request.app.state.config.AGENT_CONNECTIONS}
+    Only connections holding the Vault placeholder are looked up; inline values are
+    returned as-is. Connections sharing a scope live in one Vault secret, so each
+    distinct scope is read once. The reads run concurrently on the Vault thread pool,
+    which also bounds how many are in flight at once.
+    """
+    paths = [
+        format_secret_key(None, user_id, conn.get("agent_id"), conn.get("is_common", False))
+        if conn.get("value") == STORED_IN_VAULT
+        else None
+        for conn in connections
+    ]
+    scopes = {}
+    for conn, path in zip(connections, paths):
+        if path is not None:
+            scopes.setdefault(path, conn)
+    if not scopes:
+        return connections
+    secrets = dict(
+        zip(
+            scopes,
+            await asyncio.gather(
+                *(
+                    run_vault_call(
+                        get_agent_connection_scope_from_vault,
+                        user_id=user_id,
+                        is_common=conn.get("is_common", False),
+                        agent_id=conn.get("agent_id"),
+                    )
+                    for conn in scopes.values()
+                )
+            ),
+        )
+    )
+
+    updated_connections = []
+    for conn, path in zip(connections, paths):
+        if path is None:
+            updated_connections.append(conn)
+            continue
+        vault_value = secrets[path].get(sanitize_key_field(conn.get("name")))
+        # If found in Vault, use that value
+        updated_connections.append(
+            conn if vault_value is None else {**conn, "value": vault_value}
+        )
+    return updated_connections
 
 
 @router.get("/agent_connections", response_model=AgentConnectionsConfigForm)
 async def get_agent_connections_config(request: Request, user=Depends(get_verified_user)):
+    vault_enabled = ENABLE_VAULT_INTEGRATION.value
     # Admin users can see all connections
     if user.role == "admin":
-        # Handle case where AGENT_CONNECTIONS might be a list instead of PersistentConfig
-        agent_connections = request.app.state.config.AGENT_CONNECTIONS
-        if hasattr(agent_connections, 'value'):
-            connections = agent_connections.value
-        else:
-            # If it's already a list, use it directly
-            connections = agent_connections if isinstance(agent_connections, list) else []
+        connections = _get_agent_connections(request.app.state.config)
         
-        # Headers for Vault
-        vault_user_id = request.headers.get('x-ltai-vault-user') or user.id
-        raw_keys = request.headers.get('x-ltai-vault-keys')
-        requested_keys = _parse_requested_keys(raw_keys)
-
         # If Vault integration is enabled, fetch secrets from Vault
-        if ENABLE_VAULT_INTEGRATION.value:
-            updated_connections = []
-            for conn in connections:
-                # Compute scope for this connection
-                scope = (
-                    'common' if conn.get('is_common', False) else (
-                        'default' if not conn.get('agent_id') else sanitize_agent_name(conn.get('agent_id'))
-                    )
-                )
-                # Filter by requested (scope, sanitized key) if provided
-                if requested_keys and (scope, sanitize_key_field(conn.get('name'))) not in requested_keys:
-                    continue
-                # Try to get the value from Vault
-                vault_value = get_agent_connection_from_vault(
-                    name=conn.get("name"),
-                    user_id=vault_user_id,
-                    is_common=conn.get("is_common", False),
-                    agent_id=conn.get("agent_id")
-                )
-                
-                # If found in Vault, use that value
-                if vault_value is not None:
-                    conn_copy = dict(conn)
-                    conn_copy["value"] = vault_value
-                    updated_connections.append(conn_copy)
-                else:
-                    updated_connections.append(conn)
-            
-            return {"AGENT_CONNECTIONS": updated_connections}
-        
-        return {"AGENT_CONNECTIONS": connections}
+        return {
+            "AGENT_CONNECTIONS": await _overlay_vault_values(connections, user.id)
+            if vault_enabled
+            else connections
+        }
     
     # Regular users can only see common connections or ones associated with their agents
     # Check if user has agents property
     user_agents = getattr(user, 'agents', [])
     
-    # Handle case where AGENT_CONNECTIONS might be a list instead of PersistentConfig
-    agent_connections = request.app.state.config.AGENT_CONNECTIONS
-    if hasattr(agent_connections, 'value'):
-        all_connections = agent_connections.value
-    else:
-        all_connections = agent_connections if isinstance(agent_connections, list) else []
+    all_connections = _get_agent_connections(request.app.state.config)
     
-    user_connections = [
-        conn for conn in all_connections
-        if conn.get("is_common", False) or (conn.get("agent_id") and conn.get("agent_id") in user_agents)
-    ]
+    common_positions, positions_by_agent = _index_agent_connections(all_connections)
+    positions = list(common_positions)
+    for agent_id in frozenset(user_agents or ()):
+        positions.extend(positions_by_agent.get(agent_id, ()))
+    # Keep the configured order
+    user_connections = [all_connections[position] for position in sorted(positions)]
     
-    # Headers for Vault
-    vault_user_id = request.headers.get('x-ltai-vault-user') or user.id
-    raw_keys = request.headers.get('x-ltai-vault-keys')
-    requested_keys = _parse_requested_keys(raw_keys)
-
     # If Vault integration is enabled, fetch secrets from Vault
-    if ENABLE_VAULT_INTEGRATION.value:
-        updated_connections = []
-        for conn in user_connections:
-            # Compute scope for this connection
-            scope = (
-                'common' if conn.get('is_common', False) else (
-                    'default' if not conn.get('agent_id') else sanitize_agent_name(conn.get('agent_id'))
-                )
-            )
-            # Filter by requested (scope, sanitized key) if provided
-            if requested_keys and (scope, sanitize_key_field(conn.get('name'))) not in requested_keys:
-                continue
-            # Try to get the value from Vault
-            vault_value = get_agent_connection_from_vault(
-                name=conn.get("name"),
-                user_id=vault_user_id,
-                is_common=conn.get("is_common", False),
-                agent_id=conn.get("agent_id")
-            )
-            
-            # If found in Vault, use that value
-            if vault_value is not None:
-                conn_copy = dict(conn)
-                conn_copy["value"] = vault_value
-                updated_connections.append(conn_copy)
-            else:
-                updated_connections.append(conn)
-        
-        return {"AGENT_CONNECTIONS": updated_connections}
-    
-    return {"AGENT_CONNECTIONS": user_connections}
+    return {
+        "AGENT_CONNECTIONS": await _overlay_vault_values(user_connections, user.id)
+        if vault_enabled
+        else user_connections
+    }
 
 
 @router.post("/agent_connections", response_model=AgentConnectionsConfigForm)
@@ -711,38 +486,26 @@ async def set_agent_connections_config(
     form_data: AgentConnectionsConfigForm,
     user=Depends(get_admin_user),
 ):
-    connections = [connection.model_dump() for connection in form_data.AGENT_CONNECTIONS]
+    connections = form_data.AGENT_CONNECTIONS
     
-    # If Vault integration is enabled, store secrets in Vault
+    # If Vault integration is enabled, store secrets in Vault (one write per scope)
     if ENABLE_VAULT_INTEGRATION.value:
-        # Use header override for Vault user id if provided
-        vault_user_id = request.headers.get('x-ltai-vault-user') or user.id
-        for connection in connections:
-            # Store the secret in Vault
-            success = store_agent_connection_in_vault(connection, vault_user_id)
-            
+        # Connections still holding the placeholder are already in Vault; writing them
+        # back would replace the stored secret with the placeholder text
+        pending = [conn for conn in connections if conn.get("value") != STORED_IN_VAULT]
+        stored = await run_vault_call(store_agent_connections_in_vault, pending, user.id)
+        for connection, success in zip(pending, stored):
             # If successfully stored in Vault, remove the value from the connection
             # to avoid storing it in the database
             if success:
                 # Keep a placeholder value to indicate it's stored in Vault
-                connection["value"] = "[STORED_IN_VAULT]"
+                connection["value"] = STORED_IN_VAULT
                 logger.info(f"Stored agent connection {connection.get('name')} for user {user.id} in Vault")
             else:
                 logger.error(f"Failed to store agent connection {connection.get('name')} for user {user.id} in Vault")
     
-    # Update the PersistentConfig value (or set directly if it's a list)
-    agent_connections = request.app.state.config.AGENT_CONNECTIONS
-    if hasattr(agent_connections, 'value'):
-        agent_connections.value = connections
-    else:
-        # If it's not a PersistentConfig, set it directly
-        request.app.state.config.AGENT_CONNECTIONS = connections
-    
-    # Return the current value
-    if hasattr(request.app.state.config.AGENT_CONNECTIONS, 'value'):
-        return {"AGENT_CONNECTIONS": request.app.state.config.AGENT_CONNECTIONS.value}
-    else:
-        return {"AGENT_CONNECTIONS": request.app.state.config.AGENT_CONNECTIONS}
+    _set_agent_connections(request.app.state.config, connections)
+    return ORJSONResponse({"AGENT_CONNECTIONS": connections})
 
 
 ############################
@@ -768,22 +531,23 @@ class CodeInterpreterConfigForm(BaseModel):
 
 @router.get("/code_execution", response_model=CodeInterpreterConfigForm)
 async def get_code_execution_config(request: Request, user=Depends(get_admin_user)):
+    config = request.app.state.config
     return {
-        "ENABLE_CODE_EXECUTION": request.app.state.config.ENABLE_CODE_EXECUTION,
-        "CODE_EXECUTION_ENGINE": request.app.state.config.CODE_EXECUTION_ENGINE,
-        "CODE_EXECUTION_JUPYTER_URL": request.app.state.config.CODE_EXECUTION_JUPYTER_URL,
-        "CODE_EXECUTION_JUPYTER_AUTH": request.app.state.config.CODE_EXECUTION_JUPYTER_AUTH,
-        "CODE_EXECUTION_JUPYTER_AUTH_TOKEN": request.app.state.config.CODE_EXECUTION_JUPYTER_AUTH_TOKEN,
-        "CODE_EXECUTION_JUPYTER_AUTH_PASSWORD": request.app.state.config.CODE_EXECUTION_JUPYTER_AUTH_PASSWORD,
-        "CODE_EXECUTION_JUPYTER_TIMEOUT": request.app.state.config.CODE_EXECUTION_JUPYTER_TIMEOUT,
-        "ENABLE_CODE_INTERPRETER": request.app.state.config.ENABLE_CODE_INTERPRETER,
-        "CODE_INTERPRETER_ENGINE": request.app.state.config.CODE_INTERPRETER_ENGINE,
-        "CODE_INTERPRETER_PROMPT_TEMPLATE": request.app.state.config.CODE_INTERPRETER_PROMPT_TEMPLATE,
-        "CODE_INTERPRETER_JUPYTER_URL": request.app.state.config.CODE_INTERPRETER_JUPYTER_URL,
-        "CODE_INTERPRETER_JUPYTER_AUTH": request.app.state.config.CODE_INTERPRETER_JUPYTER_AUTH,
-        "CODE_INTERPRETER_JUPYTER_AUTH_TOKEN": request.app.state.config.CODE_INTERPRETER_JUPYTER_AUTH_TOKEN,
-        "CODE_INTERPRETER_JUPYTER_AUTH_PASSWORD": request.app.state.config.CODE_INTERPRETER_JUPYTER_AUTH_PASSWORD,
-        "CODE_INTERPRETER_JUPYTER_TIMEOUT": request.app.state.config.CODE_INTERPRETER_JUPYTER_TIMEOUT,
+        "ENABLE_CODE_EXECUTION": config.ENABLE_CODE_EXECUTION,
+        "CODE_EXECUTION_ENGINE": config.CODE_EXECUTION_ENGINE,
+        "CODE_EXECUTION_JUPYTER_URL": config.CODE_EXECUTION_JUPYTER_URL,
+        "CODE_EXECUTION_JUPYTER_AUTH": config.CODE_EXECUTION_JUPYTER_AUTH,
+        "CODE_EXECUTION_JUPYTER_AUTH_TOKEN": config.CODE_EXECUTION_JUPYTER_AUTH_TOKEN,
+        "CODE_EXECUTION_JUPYTER_AUTH_PASSWORD": config.CODE_EXECUTION_JUPYTER_AUTH_PASSWORD,
+        "CODE_EXECUTION_JUPYTER_TIMEOUT": config.CODE_EXECUTION_JUPYTER_TIMEOUT,
+        "ENABLE_CODE_INTERPRETER": config.ENABLE_CODE_INTERPRETER,
+        "CODE_INTERPRETER_ENGINE": config.CODE_INTERPRETER_ENGINE,
+        "CODE_INTERPRETER_PROMPT_TEMPLATE": config.CODE_INTERPRETER_PROMPT_TEMPLATE,
+        "CODE_INTERPRETER_JUPYTER_URL": config.CODE_INTERPRETER_JUPYTER_URL,
+        "CODE_INTERPRETER_JUPYTER_AUTH": config.CODE_INTERPRETER_JUPYTER_AUTH,
+        "CODE_INTERPRETER_JUPYTER_AUTH_TOKEN": config.CODE_INTERPRETER_JUPYTER_AUTH_TOKEN,
+        "CODE_INTERPRETER_JUPYTER_AUTH_PASSWORD": config.CODE_INTERPRETER_JUPYTER_AUTH_PASSWORD,
+        "CODE_INTERPRETER_JUPYTER_TIMEOUT": config.CODE_INTERPRETER_JUPYTER_TIMEOUT,
     }
 
 
@@ -791,67 +555,12 @@ async def get_code_execution_config(request: Request, user=Depends(get_admin_use
 async def set_code_execution_config(
     request: Request, form_data: CodeInterpreterConfigForm, user=Depends(get_admin_user)
 ):
-
-    request.app.state.config.ENABLE_CODE_EXECUTION = form_data.ENABLE_CODE_EXECUTION
-
-    request.app.state.config.CODE_EXECUTION_ENGINE = form_data.CODE_EXECUTION_ENGINE
-    request.app.state.config.CODE_EXECUTION_JUPYTER_URL = (
-        form_data.CODE_EXECUTION_JUPYTER_URL
-    )
-    request.app.state.config.CODE_EXECUTION_JUPYTER_AUTH = (
-        form_data.CODE_EXECUTION_JUPYTER_AUTH
-    )
-    request.app.state.config.CODE_EXECUTION_JUPYTER_AUTH_TOKEN = (
-        form_data.CODE_EXECUTION_JUPYTER_AUTH_TOKEN
-    )
-    request.app.state.config.CODE_EXECUTION_JUPYTER_AUTH_PASSWORD = (
-        form_data.CODE_EXECUTION_JUPYTER_AUTH_PASSWORD
-    )
-    request.app.state.config.CODE_EXECUTION_JUPYTER_TIMEOUT = (
-        form_data.CODE_EXECUTION_JUPYTER_TIMEOUT
-    )
-
-    request.app.state.config.ENABLE_CODE_INTERPRETER = form_data.ENABLE_CODE_INTERPRETER
-    request.app.state.config.CODE_INTERPRETER_ENGINE = form_data.CODE_INTERPRETER_ENGINE
-    request.app.state.config.CODE_INTERPRETER_PROMPT_TEMPLATE = (
-        form_data.CODE_INTERPRETER_PROMPT_TEMPLATE
-    )
-
-    request.app.state.config.CODE_INTERPRETER_JUPYTER_URL = (
-        form_data.CODE_INTERPRETER_JUPYTER_URL
-    )
-
-    request.app.state.config.CODE_INTERPRETER_JUPYTER_AUTH = (
-        form_data.CODE_INTERPRETER_JUPYTER_AUTH
-    )
-
-    request.app.state.config.CODE_INTERPRETER_JUPYTER_AUTH_TOKEN = (
-        form_data.CODE_INTERPRETER_JUPYTER_AUTH_TOKEN
-    )
-    request.app.state.config.CODE_INTERPRETER_JUPYTER_AUTH_PASSWORD = (
-        form_data.CODE_INTERPRETER_JUPYTER_AUTH_PASSWORD
-    )
-    request.app.state.config.CODE_INTERPRETER_JUPYTER_TIMEOUT = (
-        form_data.CODE_INTERPRETER_JUPYTER_TIMEOUT
-    )
-
-    return {
-        "ENABLE_CODE_EXECUTION": request.app.state.config.ENABLE_CODE_EXECUTION,
-        "CODE_EXECUTION_ENGINE": request.app.state.config.CODE_EXECUTION_ENGINE,
-        "CODE_EXECUTION_JUPYTER_URL": request.app.state.config.CODE_EXECUTION_JUPYTER_URL,
-        "CODE_EXECUTION_JUPYTER_AUTH": request.app.state.config.CODE_EXECUTION_JUPYTER_AUTH,
-        "CODE_EXECUTION_JUPYTER_AUTH_TOKEN": request.app.state.config.CODE_EXECUTION_JUPYTER_AUTH_TOKEN,
-        "CODE_EXECUTION_JUPYTER_AUTH_PASSWORD": request.app.state.config.CODE_EXECUTION_JUPYTER_AUTH_PASSWORD,
-        "CODE_EXECUTION_JUPYTER_TIMEOUT": request.app.state.config.CODE_EXECUTION_JUPYTER_TIMEOUT,
-        "ENABLE_CODE_INTERPRETER": request.app.state.config.ENABLE_CODE_INTERPRETER,
-        "CODE_INTERPRETER_ENGINE": request.app.state.config.CODE_INTERPRETER_ENGINE,
-        "CODE_INTERPRETER_PROMPT_TEMPLATE": request.app.state.config.CODE_INTERPRETER_PROMPT_TEMPLATE,
-        "CODE_INTERPRETER_JUPYTER_URL": request.app.state.config.CODE_INTERPRETER_JUPYTER_URL,
-        "CODE_INTERPRETER_JUPYTER_AUTH": request.app.state.config.CODE_INTERPRETER_JUPYTER_AUTH,
-        "CODE_INTERPRETER_JUPYTER_AUTH_TOKEN": request.app.state.config.CODE_INTERPRETER_JUPYTER_AUTH_TOKEN,
-        "CODE_INTERPRETER_JUPYTER_AUTH_PASSWORD": request.app.state.config.CODE_INTERPRETER_JUPYTER_AUTH_PASSWORD,
-        "CODE_INTERPRETER_JUPYTER_TIMEOUT": request.app.state.config.CODE_INTERPRETER_JUPYTER_TIMEOUT,
-    }
+    # The form fields are exactly the config keys; echo the validated values back as-is
+    data = form_data.model_dump()
+    config = request.app.state.config
+    for key, value in data.items():
+        setattr(config, key, value)
+    return ORJSONResponse(data)
 
 
 ############################
@@ -864,9 +573,10 @@ class ModelsConfigForm(BaseModel):
 
 @router.get("/models", response_model=ModelsConfigForm)
 async def get_models_config(request: Request, user=Depends(get_admin_user)):
+    config = request.app.state.config
     return {
-        "DEFAULT_MODELS": request.app.state.config.DEFAULT_MODELS,
-        "MODEL_ORDER_LIST": request.app.state.config.MODEL_ORDER_LIST,
+        "DEFAULT_MODELS": config.DEFAULT_MODELS,
+        "MODEL_ORDER_LIST": config.MODEL_ORDER_LIST,
     }
 
 
@@ -874,12 +584,11 @@ async def get_models_config(request: Request, user=Depends(get_admin_user)):
 async def set_models_config(
     request: Request, form_data: ModelsConfigForm, user=Depends(get_admin_user)
 ):
-    request.app.state.config.DEFAULT_MODELS = form_data.DEFAULT_MODELS
-    request.app.state.config.MODEL_ORDER_LIST = form_data.MODEL_ORDER_LIST
-    return {
-        "DEFAULT_MODELS": request.app.state.config.DEFAULT_MODELS,
-        "MODEL_ORDER_LIST": request.app.state.config.MODEL_ORDER_LIST,
-    }
+    data = form_data.model_dump()
+    config = request.app.state.config
+    for key, value in data.items():
+        setattr(config, key, value)
+    return ORJSONResponse(data)
 
 
 class PromptSuggestion(BaseModel):
@@ -899,7 +608,7 @@ async def set_default_suggestions(
 ):
     data = form_data.model_dump()
     request.app.state.config.DEFAULT_PROMPT_SUGGESTIONS = data["suggestions"]
-    return request.app.state.config.DEFAULT_PROMPT_SUGGESTIONS
+    return ORJSONResponse(data["suggestions"])
 
 
 ############################
@@ -919,7 +628,7 @@ async def set_banners(
 ):
     data = form_data.model_dump()
     request.app.state.config.BANNERS = data["banners"]
-    return request.app.state.config.BANNERS
+    return ORJSONResponse(data["banners"])
 
 
 @router.get("/banners", response_model=list[BannerModel])
@@ -1,17 +1,36 @@
+import asyncio
+import time
+
+import orjson
 import pytest
 import unittest.mock as mock
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 
-from open_webui.routers.agent_connections import router
+from open_webui.routers import agent_connections
+from open_webui.routers.agent_connections import router, encode_key_id, decode_key_id
+from open_webui.utils.auth import get_verified_user, get_admin_user
+from open_webui.utils.misc import TTLCache
+from open_webui.utils.response import convert_streaming_response_ollama_to_openai
+from open_webui.utils import vault
 from open_webui.utils.vault import (
     store_agent_connection_in_vault,
+    store_agent_connections_in_vault,
     get_agent_connection_from_vault,
     delete_agent_connection_from_vault,
+    move_agent_connection_in_vault,
+    list_agent_connection_scopes,
     format_secret_key
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test with empty module-level caches so results do not depend on test order."""
+    for cache in (vault._SCOPE_SECRET_CACHE, vault._SCOPE_LIST_CACHE, agent_connections._USERS_CACHE):
+        cache.clear()
+
+
 @pytest.fixture
 def client():
     from fastapi import FastAPI
@@ -20,6 +39,90 @@ def client():
     return TestClient(app)
 
 
+def _client_as(user_id, role="user"):
+    """Build a test client whose requests are authenticated as the given user."""
+    from fastapi import FastAPI
+    app = FastAPI()
+    app.include_router(router)
+    mock_user = MagicMock()
+    mock_user.id = user_id
+    mock_user.role = role
+    app.dependency_overrides[get_verified_user] = lambda: mock_user
+    app.dependency_overrides[get_admin_user] = lambda: mock_user
+    return TestClient(app)
+
+
+class _MemoryVault:
+    """In-memory stand-in for VaultClient that records the order of writes."""
+
+    def __init__(self, secrets=None, fail_writes_to=()):
+        self.secrets = {path: dict(data) for path, data in (secrets or {}).items()}
+        self.fail_writes_to = set(fail_writes_to)
+        self.writes = []
+
+    def get_secret(self, path, missing=None):
+        data = self.secrets.get(path)
+        return dict(data) if data is not None else missing
+
+    def set_secret(self, path, data):
+        self.writes.append(("set", path))
+        if path in self.fail_writes_to:
+            return False
+        self.secrets[path] = dict(data)
+        return True
+
+    def delete_secret(self, path):
+        self.writes.append(("delete", path))
+        self.secrets.pop(path, None)
+        return True
+
+
+class TestTTLCache:
+    """Test the in-process TTL cache."""
+
+    def test_get_and_expiry(self):
+        """Entries are served until their TTL passes."""
+        cache = TTLCache(maxsize=4, ttl=30)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=0.01)
+        time.sleep(0.02)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("b", "missing") == "missing"
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted when the cache is full."""
+        cache = TTLCache(maxsize=2, ttl=30)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    def test_non_positive_ttl_disables_cache(self):
+        """A ttl of 0 or less turns set() into a no-op."""
+        cache = TTLCache(maxsize=2, ttl=0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+        cache = TTLCache(maxsize=2, ttl=30)
+        cache.set("a", 1, ttl=-1)
+        assert cache.get("a") is None
+
+    def test_pop(self):
+        """pop() returns live entries and treats expired ones as missing."""
+        cache = TTLCache(maxsize=4, ttl=30)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=0.01)
+        time.sleep(0.02)
+        assert cache.pop("a") == 1
+        assert cache.pop("a") is None
+        assert cache.pop("b", "missing") == "missing"
+        assert len(cache) == 0
+
+
 class TestVaultUtils:
     """Test Vault utility functions."""
     
@@ -83,6 +186,23 @@ class TestVaultUtils:
         assert result == "test_value"
         mock_client.get_secret.assert_called_once()
     
+    @patch('open_webui.utils.vault.get_vault_client')
+    @patch('open_webui.utils.vault.ENABLE_VAULT_INTEGRATION', True)
+    def test_get_connection_cached_until_write(self, mock_get_client):
+        """Test that repeated reads of a scope hit Vault once until a write evicts it."""
+        mock_client = MagicMock()
+        mock_client.get_secret.return_value = {"test_key": "test_value", "other": "1"}
+        mock_client.set_secret.return_value = True
+        mock_get_client.return_value = mock_client
+
+        assert get_agent_connection_from_vault("test_key", "user123") == "test_value"
+        assert get_agent_connection_from_vault("other", "user123") == "1"
+        mock_client.get_secret.assert_called_once()
+
+        assert store_agent_connection_in_vault({"name": "test_key", "value": "rotated"}, "user123")
+        mock_client.get_secret.return_value = {"test_key": "rotated", "other": "1"}
+        assert get_agent_connection_from_vault("test_key", "user123") == "rotated"
+
     @patch('open_webui.utils.vault.get_vault_client')
     @patch('open_webui.utils.vault.ENABLE_VAULT_INTEGRATION', True)
     def test_delete_connection_success(self, mock_get_client):
@@ -98,6 +218,278 @@ class TestVaultUtils:
         assert result is True
         mock_client.delete_secret.assert_called_once()
 
+    @patch('open_webui.utils.vault.get_vault_client')
+    @patch('open_webui.utils.vault.ENABLE_VAULT_INTEGRATION', True)
+    def test_store_connections_grouped_by_path(self, mock_get_client):
+        """Test that batch storage writes each scope once and reports results per connection."""
+        default_path = format_secret_key(None, "user_batch")
+        agent_path = format_secret_key(None, "user_batch", agent_id="agent123")
+        mock_client = MagicMock()
+        mock_client.get_secret.side_effect = lambda path, missing=None: (
+            {"existing": "1"} if path == default_path else missing
+        )
+        mock_client.set_secret.side_effect = lambda path, data: path == default_path
+        mock_get_client.return_value = mock_client
+
+        connections = [
+            {"name": "a", "value": "1"},
+            {"name": "b", "value": "2", "agent_id": "agent123"},
+            {"name": "c", "value": 3},
+            {"name": "d", "value": None},
+        ]
+        result = store_agent_connections_in_vault(connections, "user_batch")
+
+        assert result == [True, False, True, False]
+        assert mock_client.get_secret.call_count == 2
+        writes = {call.args[0]: call.args[1] for call in mock_client.set_secret.call_args_list}
+        assert writes == {
+            default_path: {"existing": "1", "a": "1", "c": "3"},
+            agent_path: {"b": "2"},
+        }
+
+    @patch('open_webui.utils.vault.get_vault_client')
+    @patch('open_webui.utils.vault.ENABLE_VAULT_INTEGRATION', True)
+    def test_move_writes_new_entry_before_removing_old(self, mock_get_client):
+        """Test that a move stores the new entry first and carries the current value over."""
+        old_path = format_secret_key(None, "user_move", agent_id="agent1")
+        new_path = format_secret_key(None, "user_move", is_common=True)
+        memory = _MemoryVault({old_path: {"api_key": "secret", "other": "1"}})
+        mock_get_client.return_value = memory
+
+        connection = {"name": "renamed", "value": None, "agent_id": None, "is_common": True}
+        assert move_agent_connection_in_vault("api_key", "user_move", connection, agent_id="agent1") is True
+        assert memory.writes == [("set", new_path), ("set", old_path)]
+        assert memory.secrets == {new_path: {"renamed": "secret"}, old_path: {"other": "1"}}
+
+        # Nothing to carry over
+        connection = {"name": "x", "value": None, "agent_id": None, "is_common": False}
+        assert move_agent_connection_in_vault("missing", "user_move", connection, agent_id="agent1") is None
+
+    @patch('open_webui.utils.vault.get_vault_client')
+    @patch('open_webui.utils.vault.ENABLE_VAULT_INTEGRATION', True)
+    def test_move_keeps_old_entry_if_store_fails(self, mock_get_client):
+        """Test that a failed write leaves the key where it was instead of losing it."""
+        old_path = format_secret_key(None, "user_move")
+        new_path = format_secret_key(None, "user_move", agent_id="agent2")
+        memory = _MemoryVault({old_path: {"api_key": "secret"}}, fail_writes_to={new_path})
+        mock_get_client.return_value = memory
+
+        connection = {"name": "api_key", "value": "rotated", "agent_id": "agent2", "is_common": False}
+        assert move_agent_connection_in_vault("api_key", "user_move", connection) is False
+        assert memory.secrets == {old_path: {"api_key": "secret"}}
+        assert ("delete", old_path) not in memory.writes
+
+    @patch('open_webui.utils.vault.get_vault_client')
+    @patch('open_webui.utils.vault.ENABLE_VAULT_INTEGRATION', True)
+    def test_concurrent_writes_to_one_path_keep_every_field(self, mock_get_client):
+        """Test that concurrent read-modify-write cycles on one secret path do not lose updates."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        path = format_secret_key(None, "user_lock")
+        memory = _MemoryVault({path: {"api_key": "secret"}})
+        read = memory.get_secret
+
+        def slow_read(path, missing=None):
+            # Widen the window between reading the secret and writing it back
+            data = read(path, missing)
+            time.sleep(0.02)
+            return data
+
+        memory.get_secret = slow_read
+        mock_get_client.return_value = memory
+
+        def write(index):
+            if index == 0:
+                connection = {"name": "renamed", "value": None}
+                return move_agent_connection_in_vault("api_key", "user_lock", connection)
+            return store_agent_connection_in_vault({"name": f"key{index}", "value": str(index)}, "user_lock")
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            assert all(executor.map(write, range(4)))
+        assert memory.secrets[path] == {"renamed": "secret", "key1": "1", "key2": "2", "key3": "3"}
+
+    @patch('open_webui.utils.vault.get_vault_client')
+    @patch('open_webui.utils.vault.ENABLE_VAULT_INTEGRATION', True)
+    def test_failed_read_is_not_cached(self, mock_get_client):
+        """Test that a failed read is retried instead of being cached as an empty scope."""
+        mock_client = MagicMock()
+        # None is a failed read; a missing secret returns the `missing` argument
+        mock_client.get_secret.side_effect = [None, {"test_key": "test_value"}]
+        mock_get_client.return_value = mock_client
+
+        assert get_agent_connection_from_vault("test_key", "user_outage") is None
+        assert get_agent_connection_from_vault("test_key", "user_outage") == "test_value"
+        assert mock_client.get_secret.call_count == 2
+
+    @patch('open_webui.utils.vault.get_vault_client')
+    @patch('open_webui.utils.vault.ENABLE_VAULT_INTEGRATION', True)
+    def test_read_overlapping_write_is_not_cached(self, mock_get_client):
+        """Test that a read a write overlapped does not cache the secret as it was before the write."""
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.set_secret.return_value = True
+
+        def read_during_write(path, missing=None):
+            # The write lands while this read is in flight
+            mock_client.get_secret.side_effect = lambda path, missing=None: {"test_key": "old"}
+            store_agent_connection_in_vault({"name": "test_key", "value": "new"}, "user_race")
+            return {"test_key": "old"}
+
+        mock_client.get_secret.side_effect = read_during_write
+        assert get_agent_connection_from_vault("test_key", "user_race") == "old"
+
+        # The next read goes back to Vault rather than serving the pre-write secret
+        mock_client.get_secret.side_effect = lambda path, missing=None: {"test_key": "new"}
+        assert get_agent_connection_from_vault("test_key", "user_race") == "new"
+        # Generations are only kept while reads are in flight
+        assert vault._SCOPE_SECRET_CACHE._in_flight == {}
+
+    @patch('open_webui.utils.vault.get_vault_client')
+    @patch('open_webui.utils.vault.ENABLE_VAULT_INTEGRATION', True)
+    def test_listing_overlapping_write_is_not_cached(self, mock_get_client):
+        """Test that a scope listing a write overlapped does not hide the scope that write created."""
+        memory = _MemoryVault()
+        memory.list_secrets = MagicMock()
+        mock_get_client.return_value = memory
+
+        def list_during_write(path):
+            # The listing answers before the new scope exists, but returns after it was written
+            connection = {"name": "api_key", "value": "v", "agent_id": "newagent"}
+            assert store_agent_connection_in_vault(connection, "user_list")
+            return []
+
+        memory.list_secrets.side_effect = list_during_write
+        assert list_agent_connection_scopes("user_list") == ()
+
+        memory.list_secrets.side_effect = lambda path: ["newagent/"]
+        assert list_agent_connection_scopes("user_list") == ("newagent",)
+        assert vault._SCOPE_LIST_CACHE._in_flight == {}
+
+    def test_session_retries_idempotent_requests(self):
+        """Test that gateway errors are retried for reads, writes and hvac's LIST, but not POST."""
+        from open_webui.utils.vault import _build_session
+
+        session = _build_session(pool_size=2)
+        retry = session.get_adapter("https://vault.example").max_retries
+        assert retry.is_retry("LIST", 503)
+        assert retry.is_retry("GET", 502)
+        assert retry.is_retry("PUT", 504)
+        assert not retry.is_retry("POST", 503)
+        session.close()
+
+    @patch('open_webui.utils.vault.VAULT_BREAKER_THRESHOLD', 2)
+    def test_breaker_skips_requests_while_vault_is_down(self):
+        """Test that repeated transport failures stop further requests until the cooldown ends."""
+        import requests
+        from open_webui.utils.vault import VaultClient
+
+        vault_client = VaultClient()
+        vault_client.client = MagicMock()
+        vault_client._kv = MagicMock()
+        vault_client._kv.read_secret.side_effect = requests.exceptions.ConnectionError("down")
+
+        assert vault_client.get_secret("users/user123/default") is None
+        assert vault_client.get_secret("users/user123/default") is None
+        assert vault_client.get_secret("users/user123/default") is None
+        assert vault_client.set_secret("users/user123/default", {"a": "1"}) is False
+        assert vault_client._kv.read_secret.call_count == 2
+        vault_client._kv.create_or_update_secret.assert_not_called()
+
+        # After the cooldown one caller probes while the others keep failing fast
+        vault_client._open_until = 1.0
+        assert vault_client._breaker_allows() is True
+        assert vault_client._breaker_allows() is False
+
+        # A successful probe closes the breaker again
+        vault_client._open_until = 1.0
+        vault_client._kv.read_secret.side_effect = None
+        vault_client._kv.read_secret.return_value = {"data": {"a": "1"}}
+        assert vault_client.get_secret("users/user123/default") == {"a": "1"}
+        assert vault_client._failures == 0
+
+    @patch('open_webui.utils.vault.VAULT_BREAKER_THRESHOLD', 1)
+    def test_breaker_closes_after_one_probe(self):
+        """Test that a single request after the cooldown probes Vault and closes the breaker."""
+        import requests
+        from open_webui.utils.vault import VaultClient
+
+        vault_client = VaultClient()
+        vault_client.client = MagicMock()
+        vault_client._kv = MagicMock()
+        vault_client._kv.list_secrets.side_effect = requests.exceptions.ConnectionError("down")
+        assert vault_client.list_secrets("users") is None
+        assert vault_client._open_until
+
+        # Cooldown over; checking the connection first must not use up the probe
+        vault_client._open_until = 1.0
+        vault_client._kv.list_secrets.side_effect = None
+        vault_client._kv.list_secrets.return_value = {"data": {"keys": ["user123/"]}}
+        assert vault_client.ensure_connected() is True
+        assert vault_client.list_secrets("users") == ["user123/"]
+        assert vault_client._open_until == 0.0
+        assert vault_client._failures == 0
+
+    @patch('open_webui.utils.vault.VAULT_BREAKER_THRESHOLD', 1)
+    def test_breaker_probe_with_unexpected_error_reopens(self):
+        """Test that a probe failing with a non-transport error still records its outcome."""
+        import requests
+        from open_webui.utils.vault import VaultClient, VAULT_BREAKER_COOLDOWN_SECONDS
+
+        vault_client = VaultClient()
+        vault_client.client = MagicMock()
+        vault_client._kv = MagicMock()
+        vault_client._kv.read_secret.side_effect = requests.exceptions.ConnectionError("down")
+        assert vault_client.get_secret("users/user123/default") is None
+
+        vault_client._open_until = 1.0
+        vault_client._kv.read_secret.side_effect = ValueError("bad response")
+        with pytest.raises(ValueError):
+            vault_client.get_secret("users/user123/default")
+        # Reopened for the cooldown rather than held for the probe's full timeout
+        assert 0 < vault_client._open_until - time.monotonic() <= VAULT_BREAKER_COOLDOWN_SECONDS
+
+    def test_validate_mount_without_mount_policy(self):
+        """Test that a token denied the mount lookup keeps Vault enabled, unlike a missing mount."""
+        from hvac.exceptions import Forbidden, InvalidPath
+        from open_webui.utils.vault import VaultClient
+
+        vault_client = VaultClient()
+        vault_client.client = MagicMock()
+        vault_client._failures = 1
+        vault_client.client.sys.read_mount_configuration.side_effect = Forbidden("permission denied")
+        assert vault_client.validate_mount() is True
+        # Vault answered, so the breaker counts it as a success
+        assert vault_client._failures == 0
+
+        vault_client.client.sys.read_mount_configuration.side_effect = InvalidPath("no mount")
+        assert vault_client.validate_mount() is False
+
+
+class TestKeyId:
+    """Test key_id encoding and parsing."""
+    
+    def test_round_trip_with_underscores(self):
+        """Components containing underscores survive an encode/decode round trip."""
+        key_id = encode_key_id("user_123", "api_key", "webshop_email")
+        assert "/" not in key_id
+        assert decode_key_id(key_id) == ("user_123", "api_key", "webshop_email")
+
+    def test_round_trip_with_separators(self):
+        """Colons, pipes and non-ASCII characters in any component stay unambiguous."""
+        key_id = encode_key_id("org:user|1", "clé:v2", "common")
+        assert decode_key_id(key_id) == ("org:user|1", "clé:v2", "common")
+
+    def test_legacy_key_id(self):
+        """Legacy underscore-joined key_ids are still accepted."""
+        assert decode_key_id("user123_api_key_agent123") == ("user123", "api_key", "agent123")
+    
+    def test_invalid_key_id(self):
+        """Key ids without a key name are rejected."""
+        with pytest.raises(ValueError):
+            decode_key_id("user123")
+        with pytest.raises(ValueError):
+            decode_key_id("user123__common")
+
 
 class TestAgentConnectionsAPI:
     """Test Agent Connections API endpoints."""
@@ -197,6 +589,382 @@ class TestAgentConnectionsAPI:
         assert response.json()["status"] == "success"
 
 
+class TestKeyNameValidation:
+    """Test how key names in request bodies are validated."""
+
+    @patch('open_webui.routers.agent_connections.store_agent_connection_in_vault')
+    @patch('open_webui.routers.agent_connections.VAULT_CONFIG')
+    def test_create_strips_and_rejects_blank(self, mock_vault_config, mock_store):
+        """New key names lose surrounding whitespace; blank ones are rejected."""
+        mock_vault_config.value = True
+        mock_store.return_value = True
+        client = _client_as("user123")
+
+        response = client.post("/", json={"key_name": " api_key ", "key_value": "v"})
+        assert response.status_code == 200
+        assert response.json()["key_name"] == "api_key"
+        assert mock_store.call_args.args[0]["name"] == "api_key"
+        assert client.post("/", json={"key_name": "   ", "key_value": "v"}).status_code == 422
+
+    @patch('open_webui.routers.agent_connections.move_agent_connection_in_vault')
+    @patch('open_webui.routers.agent_connections.VAULT_CONFIG')
+    def test_update_keeps_stored_name(self, mock_vault_config, mock_move):
+        """Resubmitting a stored name with surrounding whitespace does not move the key."""
+        mock_vault_config.value = True
+        mock_move.return_value = True
+        client = _client_as("user123")
+        key_id = encode_key_id("user123", " api_key", "default")
+
+        response = client.put(f"/{key_id}", json={"key_name": " api_key"})
+        assert response.status_code == 200
+        assert response.json()["key_id"] == key_id
+        mock_move.assert_not_called()
+
+        response = client.put(f"/{key_id}", json={"key_name": " api_key", "key_value": "new"})
+        assert response.status_code == 200
+        assert mock_move.call_args.kwargs["connection"]["name"] == " api_key"
+        assert client.put(f"/{key_id}", json={"key_name": " "}).status_code == 422
+
+
+class TestAgentConnectionReads:
+    """Test conditional GET and HEAD of a single agent connection."""
+
+    @patch('open_webui.routers.agent_connections.get_agent_connection_from_vault')
+    @patch('open_webui.routers.agent_connections.VAULT_CONFIG')
+    def test_get_etag_and_not_modified(self, mock_vault_config, mock_get):
+        """A matching If-None-Match gets a 304 without the value."""
+        mock_vault_config.value = True
+        mock_get.return_value = "secret_value"
+        client = _client_as("user123")
+        key_id = encode_key_id("user123", "api_key", "agent123")
+
+        response = client.get(f"/{key_id}")
+        assert response.status_code == 200
+        assert response.json()["key_value"] == "secret_value"
+        etag = response.headers["etag"]
+
+        response = client.get(f"/{key_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+        # A changed value gets a new tag, so the old one no longer matches
+        mock_get.return_value = "rotated_value"
+        response = client.get(f"/{key_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    @patch('open_webui.routers.agent_connections.get_agent_connection_from_vault')
+    @patch('open_webui.routers.agent_connections.VAULT_CONFIG')
+    def test_head(self, mock_vault_config, mock_get):
+        """HEAD reports existence and the ETag without the value."""
+        mock_vault_config.value = True
+        mock_get.return_value = "secret_value"
+        client = _client_as("user123")
+        key_id = encode_key_id("user123", "api_key", "agent123")
+
+        response = client.head(f"/{key_id}")
+        assert response.status_code == 200
+        assert response.content == b""
+        etag = response.headers["etag"]
+        assert client.head(f"/{key_id}", headers={"If-None-Match": etag}).status_code == 304
+
+        mock_get.return_value = None
+        assert client.head(f"/{key_id}").status_code == 404
+
+
+class TestListConnections:
+    """Test listing the caller's agent connections."""
+
+    @staticmethod
+    def _vault_with(mock_get_client, mock_list_scopes, stored):
+        """Serve users/<user>/<scope> reads from stored, keyed by (user, scope)."""
+        mock_client = MagicMock()
+        mock_client.get_secret.side_effect = lambda path: stored.get(tuple(path.split("/")[1:]))
+        mock_get_client.return_value = mock_client
+        mock_list_scopes.side_effect = lambda user_id, recache=False: tuple(
+            scope for owner, scope in stored if owner == user_id
+        )
+        return mock_client
+
+    @patch('open_webui.routers.agent_connections.list_agent_connection_scopes')
+    @patch('open_webui.routers.agent_connections.get_vault_client')
+    @patch('open_webui.routers.agent_connections.VAULT_CONFIG')
+    def test_values(self, mock_vault_config, mock_get_client, mock_list_scopes):
+        """Values are only included with values=true, and only for the caller's own keys."""
+        mock_vault_config.value = True
+        self._vault_with(mock_get_client, mock_list_scopes, {
+            ("user123", "COMMON"): {"k1": "v1"},
+            ("user123", "agent_x"): {"k2": "v2"},
+            ("user456", "default"): {"k3": "v3"},
+        })
+        client = _client_as("user123")
+
+        rows = client.get("/").json()
+        assert {row["key_name"]: row["key_value"] for row in rows} == {"k1": None, "k2": None}
+
+        rows = client.get("/", params={"values": True}).json()
+        assert {row["key_name"]: row["key_value"] for row in rows} == {"k1": "v1", "k2": "v2"}
+        assert {row["key_name"]: (row["is_common"], row["agent_id"]) for row in rows} == {
+            "k1": (True, None),
+            "k2": (False, "agent_x"),
+        }
+
+        # Another user's values need admin rights; names alone do not
+        headers = {"X-LTAI-Vault-User": "user456"}
+        assert client.get("/", params={"values": True}, headers=headers).status_code == 403
+        assert [row["key_value"] for row in client.get("/", headers=headers).json()] == [None]
+
+
+    @patch('open_webui.routers.agent_connections.list_agent_connection_scopes')
+    @patch('open_webui.routers.agent_connections.get_vault_client')
+    @patch('open_webui.routers.agent_connections.VAULT_CONFIG')
+    def test_requested_keys_read_only_their_scopes(self, mock_vault_config, mock_get_client, mock_list_scopes):
+        """With X-LTAI-Vault-Keys only the scopes named there are read, and only the named keys listed."""
+        mock_vault_config.value = True
+        mock_client = self._vault_with(mock_get_client, mock_list_scopes, {
+            ("user123", "COMMON"): {"k1": "v1", "other": "x"},
+            ("user123", "Agent_X"): {"k_2": "v2"},
+            ("user123", "agent_y"): {"k3": "v3"},
+            ("user123", "default"): {"k4": "v4"},
+        })
+        client = _client_as("user123")
+
+        response = client.get("/", headers={"X-LTAI-Vault-Keys": "COMMON/k1, agent_x/k/2,unknown/k5,noscope"})
+        assert response.status_code == 200
+        assert sorted(row["key_name"] for row in response.json()) == ["k1", "k_2"]
+        assert sorted(call.args[0] for call in mock_client.get_secret.call_args_list) == [
+            "users/user123/Agent_X",
+            "users/user123/COMMON",
+        ]
+
+        # Nothing stored in the requested scopes means no reads at all
+        mock_client.get_secret.reset_mock()
+        assert client.get("/", headers={"X-LTAI-Vault-Keys": "unknown/k5"}).json() == []
+        mock_client.get_secret.assert_not_called()
+
+
+class TestAgentConnectionBatch:
+    """Test fetching several agent connections at once."""
+
+    @patch('open_webui.routers.agent_connections.get_agent_connection_from_vault')
+    @patch('open_webui.routers.agent_connections.VAULT_CONFIG')
+    def test_read_many(self, mock_vault_config, mock_get):
+        """POST /batch returns each key by key_id, with per-key errors instead of failing the call."""
+        mock_vault_config.value = True
+        mock_get.side_effect = lambda name, user_id, is_common, agent_id: (
+            {"api_key": "v1", "token": "v2"}.get(name)
+        )
+        client = _client_as("user123")
+        own = encode_key_id("user123", "api_key", "agent123")
+        common = encode_key_id("user123", "token", "common")
+        missing = encode_key_id("user123", "gone", "default")
+        foreign = encode_key_id("user456", "api_key", "default")
+
+        response = client.post("/batch", json={"key_ids": [own, common, own, missing, foreign, "bad"]})
+        assert response.status_code == 200
+        body = response.json()
+        assert list(body) == [own, common, missing, foreign, "bad"]
+        assert body[own]["key_value"] == "v1"
+        assert body[own]["agent_id"] == "agent123"
+        assert body[common]["is_common"] is True
+        assert body[missing] == {"status_code": 404, "detail": "Key not found"}
+        assert body[foreign]["status_code"] == 403
+        assert body["bad"]["status_code"] == 400
+        # Duplicates are read once
+        assert mock_get.call_count == 3
+
+        assert client.post("/batch", json={"key_ids": []}).status_code == 422
+
+
+class TestAdminListingPages:
+    """Test the paginated admin listing."""
+
+    @patch('open_webui.routers.agent_connections.Users')
+    @patch('open_webui.routers.agent_connections.list_agent_connection_scopes')
+    @patch('open_webui.routers.agent_connections.get_vault_client')
+    @patch('open_webui.routers.agent_connections.VAULT_CONFIG')
+    def test_limit_and_cursor(self, mock_vault_config, mock_get_client, mock_list_scopes, mock_users):
+        """Pages end on user boundaries and X-Next-Cursor points at the last user listed."""
+        mock_vault_config.value = True
+        stored = {
+            "users/u1/default": {"k1": "v", "k2": "v"},
+            "users/u2/default": {"k1": "v"},
+            "users/u3/default": {"k1": "v"},
+        }
+        mock_client = MagicMock()
+        mock_client.ensure_connected.return_value = True
+        mock_client.list_secrets.return_value = ["u3/", "u1/", "u2/"]
+        mock_client.get_secret.side_effect = lambda path: stored.get(path)
+        mock_get_client.return_value = mock_client
+        mock_list_scopes.return_value = ("default",)
+
+        def users_by_ids(user_ids):
+            users = []
+            for user_id in user_ids:
+                user = MagicMock()
+                user.id, user.name, user.email = user_id, user_id.upper(), f"{user_id}@example.com"
+                users.append(user)
+            return users
+
+        mock_users.get_users_by_user_ids.side_effect = users_by_ids
+        client = _client_as("admin1", role="admin")
+
+        # u1 alone already fills the page, and is never split across pages
+        response = client.get("/admin/all", params={"limit": 1, "recache": True})
+        assert response.status_code == 200
+        assert [row["user_id"] for row in response.json()] == ["u1", "u1"]
+        assert response.headers["x-next-cursor"] == "u1"
+
+        response = client.get("/admin/all", params={"limit": 2, "cursor": "u1", "recache": True})
+        assert [row["user_id"] for row in response.json()] == ["u2", "u3"]
+        assert "x-next-cursor" not in response.headers
+
+        # A user whose scopes cannot be listed is skipped, but counted
+        mock_list_scopes.side_effect = lambda user_id, recache=False: None if user_id == "u2" else ("default",)
+        response = client.get("/admin/all", params={"limit": 5, "recache": True})
+        assert [row["user_id"] for row in response.json()] == ["u1", "u1", "u3"]
+        assert response.headers["x-failed-users"] == "1"
+
+    def test_cursor_requires_limit(self):
+        """A cursor without a limit is rejected rather than ignored."""
+        client = _client_as("admin1", role="admin")
+        response = client.get("/admin/all", params={"cursor": "u1"})
+        assert response.status_code == 400
+
+
+class TestAgentConnectionsConfig:
+    """Test the agent connections config routes backed by Vault."""
+
+    @staticmethod
+    def _config_client(connections, role="admin", agents=()):
+        from fastapi import FastAPI
+        from open_webui.routers.configs import router as configs_router
+        app = FastAPI()
+        app.include_router(configs_router)
+        app.state.config = MagicMock()
+        app.state.config.AGENT_CONNECTIONS = connections
+        mock_user = MagicMock()
+        mock_user.id, mock_user.role, mock_user.agents = "admin1", role, list(agents)
+        app.dependency_overrides[get_verified_user] = lambda: mock_user
+        app.dependency_overrides[get_admin_user] = lambda: mock_user
+        return app, TestClient(app)
+
+    @patch('open_webui.routers.configs.get_agent_connection_scope_from_vault')
+    @patch('open_webui.routers.configs.ENABLE_VAULT_INTEGRATION')
+    def test_get_reads_each_scope_once(self, mock_vault_enabled, mock_get_scope):
+        """Vault values replace the placeholder with one read per scope; inline values are kept."""
+        from open_webui.routers.configs import STORED_IN_VAULT
+        mock_vault_enabled.value = True
+        mock_get_scope.side_effect = lambda user_id, is_common, agent_id: (
+            {"a": "va", "b": "vb"} if agent_id == "agent1" else {"c": "vc"}
+        )
+        connections = [
+            {"name": "a", "value": STORED_IN_VAULT, "agent_id": "agent1", "is_common": False},
+            {"name": "b", "value": STORED_IN_VAULT, "agent_id": "agent1", "is_common": False},
+            {"name": "c", "value": STORED_IN_VAULT, "agent_id": None, "is_common": True},
+            {"name": "d", "value": "inline", "agent_id": "agent1", "is_common": False},
+        ]
+        _, client = self._config_client(connections)
+
+        response = client.get("/agent_connections")
+        assert response.status_code == 200
+        assert [conn["value"] for conn in response.json()["AGENT_CONNECTIONS"]] == ["va", "vb", "vc", "inline"]
+        assert mock_get_scope.call_count == 2
+        # The stored config keeps its placeholders
+        assert connections[0]["value"] == STORED_IN_VAULT
+
+    @patch('open_webui.routers.configs.get_agent_connection_scope_from_vault')
+    @patch('open_webui.routers.configs.ENABLE_VAULT_INTEGRATION')
+    def test_get_filters_for_regular_users(self, mock_vault_enabled, mock_get_scope):
+        """Regular users only see common connections and those of their own agents."""
+        mock_vault_enabled.value = False
+        connections = [
+            {"name": "a", "value": "1", "agent_id": "agent1", "is_common": False},
+            {"name": "b", "value": "2", "agent_id": "agent2", "is_common": False},
+            {"name": "c", "value": "3", "agent_id": None, "is_common": True},
+        ]
+        _, client = self._config_client(connections, role="user", agents=["agent2"])
+
+        response = client.get("/agent_connections")
+        assert [conn["name"] for conn in response.json()["AGENT_CONNECTIONS"]] == ["b", "c"]
+        mock_get_scope.assert_not_called()
+
+    @patch('open_webui.routers.configs.store_agent_connections_in_vault')
+    @patch('open_webui.routers.configs.ENABLE_VAULT_INTEGRATION')
+    def test_set_stores_new_values_in_one_batch(self, mock_vault_enabled, mock_store):
+        """New values go to Vault in one batched call and are replaced by the placeholder."""
+        from open_webui.routers.configs import STORED_IN_VAULT
+        mock_vault_enabled.value = True
+        mock_store.side_effect = lambda connections, user_id: [conn["name"] != "b" for conn in connections]
+        app, client = self._config_client([])
+
+        response = client.post("/agent_connections", json={"AGENT_CONNECTIONS": [
+            {"name": "a", "value": "secret", "agent_id": "agent1", "is_common": "false"},
+            {"name": "b", "value": "kept", "agent_id": "agent1"},
+            {"name": "c", "value": STORED_IN_VAULT, "is_common": True},
+        ]})
+        assert response.status_code == 200
+        mock_store.assert_called_once()
+        # Connections already in Vault are not written back
+        assert [conn["name"] for conn in mock_store.call_args.args[0]] == ["a", "b"]
+        saved = app.state.config.AGENT_CONNECTIONS
+        assert [conn["value"] for conn in saved] == [STORED_IN_VAULT, "kept", STORED_IN_VAULT]
+        assert saved[0]["is_common"] is False
+        assert response.json()["AGENT_CONNECTIONS"] == saved
+
+    def test_set_rejects_malformed_connections(self):
+        """Connections without string name/value or with a non-string agent_id are rejected."""
+        _, client = self._config_client([])
+        for connection in ({"name": "a"}, {"name": "a", "value": 1}, {"name": "a", "value": "v", "agent_id": 3}):
+            response = client.post("/agent_connections", json={"AGENT_CONNECTIONS": [connection]})
+            assert response.status_code == 422
+
+
+class TestOllamaStreamConversion:
+    """Test converting Ollama NDJSON streams to OpenAI SSE frames."""
+
+    def test_content_fast_path(self):
+        """Content-only lines reuse one chunk without leaking text between frames."""
+        lines = [
+            {"model": "m", "message": {"role": "assistant", "content": "Hel"}, "done": False},
+            {"model": "m", "message": {"role": "assistant", "content": "lo"}, "done": False},
+            {"model": "m", "message": {"role": "assistant", "thinking": "hmm", "content": ""}, "done": False},
+            {"model": "m", "message": {"role": "assistant", "content": "!"}, "done": False},
+            {
+                "model": "m",
+                "message": {"role": "assistant", "content": ""},
+                "done": True,
+                "prompt_eval_count": 3,
+                "eval_count": 4,
+            },
+        ]
+
+        async def body():
+            for line in lines:
+                yield orjson.dumps(line) + b"\n"
+
+        async def collect():
+            response = MagicMock()
+            response.body_iterator = body()
+            return [frame async for frame in convert_streaming_response_ollama_to_openai(response)]
+
+        frames = asyncio.run(collect())
+
+        assert all(frame.startswith(b"data: ") and frame.endswith(b"\n\n") for frame in frames)
+        assert frames[-1] == b"data: [DONE]\n\n"
+        chunks = [orjson.loads(frame[len(b"data: "):]) for frame in frames[:-1]]
+        deltas = [chunk["choices"][0]["delta"] for chunk in chunks]
+        assert [delta.get("content") for delta in deltas[:2]] == ["Hel", "lo"]
+        assert deltas[2].get("reasoning_content") == "hmm"
+        assert deltas[3].get("content") == "!"
+        assert chunks[0]["model"] == "m"
+        # One id and timestamp for the whole stream, whatever kind of chunk
+        assert len({(chunk["id"], chunk["created"]) for chunk in chunks}) == 1
+        assert chunks[-1]["usage"]["prompt_tokens"] == 3
+        assert chunks[-1]["usage"]["completion_tokens"] == 4
+
+
 class TestIntegration:
     """Integration tests for the complete flow."""
     
@@ -216,7 +984,8 @@ class TestIntegration:
             "agent_id": "agent123"
         }
         
-        # Mock successful storage
+        # Mock successful storage into a scope that holds nothing yet
+        mock_client.get_secret.return_value = {}
         mock_client.set_secret.return_value = True
         result = store_agent_connection_in_vault(connection, "user123")
         assert result is True
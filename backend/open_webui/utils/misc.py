@@ -11,6 +11,7 @@ import json
 
 
 import collections.abc
+from collections import OrderedDict
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
@@ -523,3 +524,57 @@ def throttle(interval: float = 10.0):
         return wrapper
 
     return decorator
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded in-process cache whose entries expire after a TTL.
+
+    When full, the least recently used entry is evicted. A ttl of 0 (or less)
+    disables caching: set() becomes a no-op and get() always misses.
+
+    :param maxsize: Maximum number of entries kept in the cache.
+    :param ttl: Default lifetime of an entry, in seconds.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return default
+        return entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -1,5 +1,8 @@
 import json
 from uuid import uuid4
+
+import orjson
+
 from open_webui.utils.misc import (
     openai_chat_chunk_message_template,
     openai_chat_completion_message_template,
@@ -24,6 +27,10 @@ def convert_ollama_tool_call_to_openai(tool_calls: list) -> list:
 
 
 def convert_ollama_usage_to_openai(data: dict) -> dict:
+    total_seconds = (data.get("total_duration", 0) or 0) // 1_000_000_000
+    hours, remainder = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+
     return {
         "response_token/s": (
             round(
@@ -65,9 +72,7 @@ def convert_ollama_usage_to_openai(data: dict) -> dict:
             data.get("eval_count", 0)
         ),  # This is the OpenAI compatible key
         "eval_duration": data.get("eval_duration", 0),
-        "approximate_total": (lambda s: f"{s // 3600}h{(s % 3600) // 60}m{s % 60}s")(
-            (data.get("total_duration", 0) or 0) // 1_000_000_000
-        ),
+        "approximate_total": f"{hours}h{minutes}m{seconds}s",
         "total_tokens": int(  # This is the OpenAI compatible key
             data.get("prompt_eval_count", 0) + data.get("eval_count", 0)
         ),
@@ -100,20 +105,43 @@ def convert_response_ollama_to_openai(ollama_response: dict) -> dict:
 
 
 async def convert_streaming_response_ollama_to_openai(ollama_streaming_response):
+    # Plain content tokens only differ in their delta text, so one chunk is built
+    # per stream and its content swapped in for each of them
+    content_chunk = None
+    # Every chunk of a stream carries the id and timestamp of the first one, as in
+    # OpenAI streams; the chunks built per line get them copied over
+    stream_id = created = None
+
+    # The upstream body yields one NDJSON line per item; orjson parses the bytes as-is
     async for data in ollama_streaming_response.body_iterator:
-        data = json.loads(data)
+        data = orjson.loads(data)
 
         model = data.get("model", "ollama")
-        message_content = data.get("message", {}).get("content", None)
-        reasoning_content = data.get("message", {}).get("thinking", None)
-        tool_calls = data.get("message", {}).get("tool_calls", None)
+        message = data.get("message", {})
+        message_content = message.get("content", None)
+        reasoning_content = message.get("thinking", None)
+        tool_calls = message.get("tool_calls", None)
+        done = data.get("done", False)
+
+        if message_content and not reasoning_content and not tool_calls and not done:
+            if content_chunk is None:
+                content_chunk = openai_chat_chunk_message_template(
+                    model, message_content
+                )
+                if stream_id is None:
+                    stream_id, created = content_chunk["id"], content_chunk["created"]
+                else:
+                    content_chunk["id"], content_chunk["created"] = stream_id, created
+            else:
+                content_chunk["choices"][0]["delta"]["content"] = message_content
+            yield b"data: " + orjson.dumps(content_chunk) + b"\n\n"
+            continue
+
         openai_tool_calls = None
 
         if tool_calls:
             openai_tool_calls = convert_ollama_tool_call_to_openai(tool_calls)
 
-        done = data.get("done", False)
-
         usage = None
         if done:
             usage = convert_ollama_usage_to_openai(data)
@@ -121,11 +149,14 @@ async def convert_streaming_response_ollama_to_openai(ollama_streaming_response)
         data = openai_chat_chunk_message_template(
             model, message_content, reasoning_content, openai_tool_calls, usage
         )
+        if stream_id is None:
+            stream_id, created = data["id"], data["created"]
+        else:
+            data["id"], data["created"] = stream_id, created
 
-        line = f"data: {json.dumps(data)}\n\n"
-        yield line
+        yield b"data: " + orjson.dumps(data) + b"\n\n"
 
-    yield "data: [DONE]\n\n"
+    yield b"data: [DONE]\n\n"
 
 
 def convert_embedding_response_ollama_to_openai(response) -> dict:
@@ -5,13 +5,24 @@ This module provides functionality to securely store and retrieve agent connecti
 secrets in HashiCorp Vault instead of the local database.
 """
 
+import asyncio
 import os
 import re
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache, partial
 from typing import Dict, Any, Optional, List, Tuple
 
 import hvac
-from hvac.exceptions import VaultError, InvalidPath
+import requests
+from hvac.exceptions import VaultError, Forbidden, InvalidPath, InvalidRequest
 from loguru import logger
+from open_webui.utils.misc import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Environment variable configuration
 VAULT_URL = os.environ.get("VAULT_URL", "http://localhost:8200")
@@ -21,9 +32,20 @@ VAULT_VERSION = int(os.environ.get("VAULT_VERSION", "1"))
 ENABLE_VAULT_INTEGRATION = os.environ.get("ENABLE_VAULT_INTEGRATION", "false").lower() == "true"
 VAULT_TIMEOUT = int(os.environ.get("VAULT_TIMEOUT", "30"))
 VAULT_VERIFY_SSL = os.environ.get("VAULT_VERIFY_SSL", "true").lower() == "true"
+VAULT_POOL_SIZE = int(os.environ.get("VAULT_POOL_SIZE", "32"))
+VAULT_CACHE_TTL_SECONDS = float(os.environ.get("VAULT_CACHE_TTL_SECONDS", "30"))
+VAULT_BREAKER_THRESHOLD = int(os.environ.get("VAULT_BREAKER_THRESHOLD", "5"))
+VAULT_BREAKER_COOLDOWN_SECONDS = float(os.environ.get("VAULT_BREAKER_COOLDOWN_SECONDS", "10"))
+# Extra attempts the HTTP session makes for a dropped connection or a gateway error, for
+# idempotent requests only: urllib3's default methods plus hvac's LIST, never POST
+_RETRY_TOTAL = 2
 # NOTE: Values are stored in Vault as-is; no additional application-level encryption.
 
+# Runs of characters that are not allowed in an agent path segment
+_NON_ALNUM_RE = re.compile(r"[^A-Za-z0-9]+")
 
+
+@lru_cache(maxsize=4096)
 def sanitize_agent_name(agent_identifier: Optional[str]) -> str:
     """Normalize an agent/model identifier to an underscore-safe name.
 
@@ -49,13 +71,13 @@ def sanitize_agent_name(agent_identifier: Optional[str]) -> str:
         return "default"
     ident = str(agent_identifier)
     # Take part before the first ':' if present
-    if ":" in ident:
-        ident = ident.split(":", 1)[0]
+    ident = ident.partition(":")[0]
     # Replace any run of non-alphanumeric chars with a single underscore
-    normalized = re.sub(r"[^A-Za-z0-9]+", "_", ident).strip("_")
+    normalized = _NON_ALNUM_RE.sub("_", ident).strip("_")
     return normalized if normalized else "default"
 
 
+@lru_cache(maxsize=4096)
 def sanitize_key_field(key: str) -> str:
     """Sanitize a secret field (key name) to match our storage and filtering rules.
 
@@ -67,14 +89,162 @@ def sanitize_key_field(key: str) -> str:
     if key is None:
         return key
     # Drop version suffix or trailing part after ':'
-    head = key.split(":", 1)[0]
+    head = key.partition(":")[0]
     # Replace path separators with underscore
     return head.replace("/", "_").replace("\\", "_")
 
 
+def _build_session(pool_size: int = VAULT_POOL_SIZE) -> requests.Session:
+    """Create a keep-alive HTTP session with a connection pool sized for concurrent requests."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        # Retry dropped connections and transient gateway/unavailable responses briefly;
+        # the last response is still handed to hvac so it raises its usual errors
+        max_retries=Retry(
+            total=_RETRY_TOTAL,
+            backoff_factor=0.1,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"LIST"},
+            raise_on_status=False,
+        ),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Guards the cache updates of _GuardedCache; no Vault I/O happens under it
+_SCOPE_CACHE_LOCK = threading.Lock()
+
+
+class _GuardedCache:
+    """A TTLCache that skips filling in a Vault read if a write to the same key overlapped it.
+
+    A read calls begin() before asking Vault and finish() afterwards, and the write helpers
+    record each write with write(). A write bumps the generation of any reads of that key
+    still in flight, and finish() only caches a result whose generation is unchanged, so a
+    read that started before a write cannot put back what it saw after the writer updated
+    the cache. Generations are kept only while reads of the key are in flight.
+    """
+
+    __slots__ = ("cache", "_in_flight")
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # key -> [generation, reads in flight]
+        self._in_flight: Dict[Any, List[int]] = {}
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def begin(self, key) -> int:
+        """Register a read of key; pass the returned generation to finish()."""
+        with _SCOPE_CACHE_LOCK:
+            entry = self._in_flight.setdefault(key, [0, 0])
+            entry[1] += 1
+            return entry[0]
+
+    def finish(self, key, generation: int, value) -> None:
+        """End a read of key, caching value unless it is None or a write overlapped the read."""
+        with _SCOPE_CACHE_LOCK:
+            entry = self._in_flight[key]
+            if value is not None and entry[0] == generation:
+                self.cache.set(key, value)
+            entry[1] -= 1
+            if not entry[1]:
+                del self._in_flight[key]
+
+    def write(self, key, value=None) -> None:
+        """Record a write to key: cache what was written, or drop the entry if value is None."""
+        with _SCOPE_CACHE_LOCK:
+            entry = self._in_flight.get(key)
+            if entry is not None:
+                entry[0] += 1
+            if value is not None:
+                self.cache.set(key, value)
+            else:
+                self.cache.pop(key)
+
+
+
+# Whole scope secrets recently read by the get helpers, keyed by path; missing secrets are
+# cached as {}, failed reads are not. The helpers below write through the paths they
+# write, or evict them if the write failed; the TTL bounds staleness from writers outside
+# this process.
+_SCOPE_SECRET_CACHE = _GuardedCache(maxsize=2048, ttl=VAULT_CACHE_TTL_SECONDS)
+
+
+# Agent scopes listed under users/<user id>, keyed by user id. The write helpers drop the
+# entry of the user they write for.
+_SCOPE_LIST_CACHE = _GuardedCache(maxsize=1024, ttl=VAULT_CACHE_TTL_SECONDS)
+
+
+def _write_through_scope_secret(path: str, secret: Dict[str, Any], written: bool) -> None:
+    """Cache what was just written to a scope path, or drop the entry if the write failed."""
+    _SCOPE_SECRET_CACHE.write(path, secret if written else None)
+
+
+# One lock per secret path. Every field of a scope lives in a single secret that is
+# rewritten on each change, so read-modify-write cycles on the same path must not
+# interleave, whichever route they come from. Locks disappear once nothing holds them.
+_PATH_LOCKS: "weakref.WeakValueDictionary[str, threading.RLock]" = weakref.WeakValueDictionary()
+_PATH_LOCKS_GUARD = threading.Lock()
+
+
+@contextmanager
+def _locked_paths(*paths: str):
+    """Hold the write locks for the given secret paths (taken in sorted order)."""
+    with ExitStack() as stack:
+        for path in sorted(set(paths)):
+            with _PATH_LOCKS_GUARD:
+                lock = _PATH_LOCKS.get(path)
+                if lock is None:
+                    lock = threading.RLock()
+                    _PATH_LOCKS[path] = lock
+            stack.enter_context(lock)
+        yield
+
+
+# Blocking Vault calls made from async code run here instead of the default executor,
+# whose min(32, cpu + 4) threads would otherwise cap concurrency below VAULT_POOL_SIZE.
+_VAULT_EXECUTOR = ThreadPoolExecutor(max_workers=VAULT_POOL_SIZE, thread_name_prefix="vault")
+
+
+async def run_vault_call(func, *args, **kwargs):
+    """Run a blocking Vault call on the dedicated Vault thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_VAULT_EXECUTOR, partial(func, *args, **kwargs))
+
+
+class _BreakerOpen(Exception):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+
 class VaultClient:
     """Client for interacting with HashiCorp Vault."""
-    
+
+    __slots__ = (
+        "url",
+        "token",
+        "mount_path",
+        "kv_version",
+        "timeout",
+        "verify_ssl",
+        "client",
+        "_kv",
+        "session",
+        "_connect_lock",
+        "_mount_verified",
+        "_breaker_lock",
+        "_failures",
+        "_open_until",
+    )
+
     def __init__(
         self,
         url: str = VAULT_URL,
@@ -101,6 +271,15 @@ class VaultClient:
         self.timeout = timeout
         self.verify_ssl = verify_ssl
         self.client = None
+        self._kv = None
+        self.session = None
+        self._connect_lock = threading.Lock()
+        self._mount_verified = False
+        # Circuit breaker: consecutive requests that got no response from Vault, and
+        # until when requests fail fast (0 while closed)
+        self._breaker_lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
         
         # Validate KV version
         if self.kv_version != 1:
@@ -109,59 +288,230 @@ class VaultClient:
     def connect(self) -> bool:
         """Connect to Vault server and verify authentication.
         
+        The underlying HTTP session is created once and reused, so reconnecting
+        does not open new TCP/TLS connections for every request.
+        
         Returns:
             bool: True if connection is successful, False otherwise
         """
         try:
-            self.client = hvac.Client(
+            if self.session is None:
+                self.session = _build_session()
+            client = hvac.Client(
                 url=self.url,
                 token=self.token,
                 timeout=self.timeout,
-                verify=self.verify_ssl
+                verify=self.verify_ssl,
+                session=self.session
             )
             
             # Check if client is authenticated
-            if not self.client.is_authenticated():
+            with self._request():
+                authenticated = client.is_authenticated()
+            if not authenticated:
                 logger.error("Failed to authenticate with Vault")
                 return False
                 
-            # Check if KV secrets engine is mounted
-            mounted_engines = self.client.sys.list_mounted_secrets_engines()['data']
-            mount_path_with_slash = f"{self.mount_path}/" if not self.mount_path.endswith('/') else self.mount_path
-            
-            if mount_path_with_slash not in mounted_engines:
-                logger.error(f"KV secrets engine not mounted at {self.mount_path}")
-                return False
-                
+            # hvac resolves secrets.kv.v1 through several dynamic lookups; bind it once
+            self._kv = client.secrets.kv.v1
+            self.client = client
             return True
+        except _BreakerOpen:
+            return False
         except Exception as e:
-            logger.error(f"Failed to connect to Vault: {str(e)}")
+            logger.error("Failed to connect to Vault: {}", e)
             return False
     
-    def get_secret(self, key: str) -> Optional[Dict[str, Any]]:
+    def validate_mount(self) -> bool:
+        """Check that a KV secrets engine is mounted at the configured mount path.
+        
+        Only the explicit connection test runs this; regular reads and writes surface
+        a misconfigured mount as a failed request instead of probing on every connect.
+        
+        Returns:
+            bool: True if the mount exists or the token may not check it, False otherwise
+        """
+        if self._mount_verified:
+            return True
+        if not self.ensure_connected():
+            return False
+        
+        try:
+            # Reads just this mount's tuning instead of listing every mount on the server;
+            # Vault rejects the request if nothing is mounted there.
+            with self._request():
+                self.client.sys.read_mount_configuration(path=self.mount_path.strip('/'))
+        except _BreakerOpen:
+            return False
+        except Forbidden:
+            # Reading mount tuning needs its own policy; a token limited to its secrets
+            # cannot check the mount, which says nothing about whether it works
+            logger.warning(
+                "Vault token may not read the configuration of mount {}; skipping the mount check",
+                self.mount_path,
+            )
+            return True
+        except (InvalidPath, InvalidRequest):
+            logger.error("KV secrets engine not mounted at {}", self.mount_path)
+            return False
+        except Exception as e:
+            logger.error("Failed to read Vault mount {}: {}", self.mount_path, e)
+            return False
+        
+        self._mount_verified = True
+        return True
+    
+    def ensure_connected(self) -> bool:
+        """Connect on first use and reuse the authenticated client afterwards.
+        
+        Concurrent first calls wait for a single connection attempt instead of each
+        running their own authentication round trips. Sends no request once connected,
+        so it leaves the circuit breaker to the request that follows.
+        
+        Returns:
+            bool: True if a connected client is available, False otherwise
+        """
+        if self.client is not None:
+            return True
+        with self._connect_lock:
+            if self.client is not None:
+                return True
+            return self.connect()
+    
+    def _breaker_allows(self) -> bool:
+        """Whether a request may go out, given the circuit breaker state.
+        
+        While the breaker is open every caller fails fast. Once the cooldown ends one
+        caller is let through as a probe, and the open window is pushed past the longest
+        that probe can take, so the others keep failing fast until its outcome closes
+        or reopens the breaker.
+        """
+        if not self._open_until:
+            return True
+        with self._breaker_lock:
+            if not self._open_until:
+                return True
+            now = time.monotonic()
+            if now < self._open_until:
+                return False
+            self._open_until = now + self.timeout * (_RETRY_TOTAL + 1)
+            return True
+    
+    @contextmanager
+    def _request(self):
+        """Guard one request to Vault with the circuit breaker.
+        
+        Raises _BreakerOpen instead of letting the request out while the breaker is
+        open. Otherwise the outcome is always recorded: an answer from Vault, errors
+        included, closes the breaker and anything else counts as a failure, so a
+        half-open probe never leaves the breaker waiting on it.
+        """
+        if not self._breaker_allows():
+            raise _BreakerOpen()
+        answered = False
+        try:
+            yield
+            answered = True
+        except VaultError:
+            answered = True
+            raise
+        finally:
+            if answered:
+                self._record_success()
+            else:
+                self._record_failure()
+    
+    def _record_success(self) -> None:
+        """Close the circuit breaker after Vault answered a request (with any status)."""
+        if self._failures or self._open_until:
+            with self._breaker_lock:
+                self._failures = 0
+                self._open_until = 0.0
+    
+    def _record_failure(self) -> None:
+        """Count a request that got no response; open the breaker at the threshold.
+        
+        While open, requests fail fast instead of every call waiting out the request
+        timeout.
+        """
+        with self._breaker_lock:
+            self._failures += 1
+            if self._failures < VAULT_BREAKER_THRESHOLD:
+                return
+            if not self._open_until:
+                logger.warning(
+                    "Vault unreachable after {} failed requests; pausing requests for {}s",
+                    self._failures,
+                    VAULT_BREAKER_COOLDOWN_SECONDS,
+                )
+            self._open_until = time.monotonic() + VAULT_BREAKER_COOLDOWN_SECONDS
+    
+    def close(self) -> None:
+        """Release pooled HTTP connections held by this client."""
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+        self.client = None
+        self._kv = None
+    
+    def get_secret(self, key: str, missing: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """Get a secret from Vault.
         
         Args:
             key: Secret key
+            missing: Returned if the secret does not exist, so callers can tell a
+                missing secret apart from a failed read
             
         Returns:
-            Optional[Dict[str, Any]]: Secret data or None if not found
+            Optional[Dict[str, Any]]: Secret data, ``missing`` if not found, or None if
+            the read failed
         """
-        if not self.client:
-            if not self.connect():
-                return None
+        if not self.ensure_connected():
+            return None
         
         try:
-            secret = self.client.secrets.kv.v1.read_secret(
-                path=key,
-                mount_point=self.mount_path
-            )
+            with self._request():
+                secret = self._kv.read_secret(
+                    path=key,
+                    mount_point=self.mount_path
+                )
             return secret.get('data')
+        except _BreakerOpen:
+            return None
         except InvalidPath:
             # Secret not found
+            return missing
+        except (VaultError, requests.exceptions.RequestException) as e:
+            logger.error("Failed to get secret {}: {}", key, e)
+            return None
+    
+    def list_secrets(self, key: str) -> Optional[List[str]]:
+        """List the keys stored under a path in Vault.
+        
+        Args:
+            key: Secret path
+            
+        Returns:
+            Optional[List[str]]: Key names (sub-paths end with '/'), [] if nothing is
+            stored there, or None if the listing failed
+        """
+        if not self.ensure_connected():
             return None
-        except VaultError as e:
-            logger.error(f"Failed to get secret {key}: {str(e)}")
+        
+        try:
+            with self._request():
+                response = self._kv.list_secrets(
+                    path=key,
+                    mount_point=self.mount_path
+                )
+            return ((response or {}).get('data') or {}).get('keys') or []
+        except _BreakerOpen:
+            return None
+        except InvalidPath:
+            # Nothing stored under this path
+            return []
+        except (VaultError, requests.exceptions.RequestException) as e:
+            logger.error("Failed to list secrets under {}: {}", key, e)
             return None
     
     def set_secret(self, key: str, data: Dict[str, Any]) -> bool:
@@ -174,19 +524,21 @@ class VaultClient:
         Returns:
             bool: True if successful, False otherwise
         """
-        if not self.client:
-            if not self.connect():
-                return False
+        if not self.ensure_connected():
+            return False
         
         try:
-            self.client.secrets.kv.v1.create_or_update_secret(
-                path=key,
-                secret=data,
-                mount_point=self.mount_path
-            )
+            with self._request():
+                self._kv.create_or_update_secret(
+                    path=key,
+                    secret=data,
+                    mount_point=self.mount_path
+                )
             return True
-        except VaultError as e:
-            logger.error(f"Failed to set secret {key}: {str(e)}")
+        except _BreakerOpen:
+            return False
+        except (VaultError, requests.exceptions.RequestException) as e:
+            logger.error("Failed to set secret {}: {}", key, e)
             return False
     
     def delete_secret(self, key: str) -> bool:
@@ -198,28 +550,34 @@ class VaultClient:
         Returns:
             bool: True if successful, False otherwise
         """
-        if not self.client:
-            if not self.connect():
-                return False
+        if not self.ensure_connected():
+            return False
         
         try:
-            self.client.secrets.kv.v1.delete_secret(
-                path=key,
-                mount_point=self.mount_path
-            )
+            with self._request():
+                self._kv.delete_secret(
+                    path=key,
+                    mount_point=self.mount_path
+                )
             return True
-        except VaultError as e:
-            logger.error(f"Failed to delete secret {key}: {str(e)}")
+        except _BreakerOpen:
+            return False
+        except (VaultError, requests.exceptions.RequestException) as e:
+            logger.error("Failed to delete secret {}: {}", key, e)
             return False
 
 
 # Global vault client instance
 _vault_client = None
+_vault_client_lock = threading.Lock()
 
 
 def get_vault_client() -> Optional[VaultClient]:
     """Get the global Vault client instance.
     
+    The instance (and its pooled HTTP session) is shared by all requests; it is
+    created once under a lock because callers run in worker threads.
+    
     Returns:
         Optional[VaultClient]: Vault client instance or None if not enabled
     """
@@ -229,14 +587,16 @@ def get_vault_client() -> Optional[VaultClient]:
         return None
     
     if _vault_client is None:
-        _vault_client = VaultClient(
-            url=VAULT_URL,
-            token=VAULT_TOKEN,
-            mount_path=VAULT_MOUNT_PATH,
-            kv_version=VAULT_VERSION,
-            timeout=VAULT_TIMEOUT,
-            verify_ssl=VAULT_VERIFY_SSL
-        )
+        with _vault_client_lock:
+            if _vault_client is None:
+                _vault_client = VaultClient(
+                    url=VAULT_URL,
+                    token=VAULT_TOKEN,
+                    mount_path=VAULT_MOUNT_PATH,
+                    kv_version=VAULT_VERSION,
+                    timeout=VAULT_TIMEOUT,
+                    verify_ssl=VAULT_VERIFY_SSL
+                )
     
     return _vault_client
 
@@ -272,10 +632,14 @@ def test_vault_connection(
             verify_ssl=verify_ssl
         )
         
-        if client.connect():
+        try:
+            if not client.connect():
+                return False, "Failed to connect to Vault"
+            if not client.validate_mount():
+                return False, f"KV secrets engine not mounted at {mount_path}"
             return True, "Successfully connected to Vault"
-        else:
-            return False, "Failed to connect to Vault"
+        finally:
+            client.close()
     except Exception as e:
         return False, f"Error connecting to Vault: {str(e)}"
 
@@ -295,6 +659,12 @@ def format_secret_key(name: str, user_id: str, agent_id: Optional[str] = None, i
     Returns:
         str: Formatted secret base path (relative to mount point).
     """
+    return _scope_path(user_id, agent_id, bool(is_common))
+
+
+@lru_cache(maxsize=16384)
+def _scope_path(user_id: str, agent_id: Optional[str], is_common: bool) -> str:
+    """Build (and memoize) the secret path for one user/scope combination."""
     if is_common:
         agent_name = "COMMON"
     elif agent_id:
@@ -335,17 +705,95 @@ def store_agent_connection_in_vault(connection: Dict[str, Any], user_id: str) ->
 
     try:
         path = format_secret_key(name, user_id, agent_id, is_common)
-        # Merge with existing data to preserve other keys under the same agent secret
-        existing = client.get_secret(path) or {}
-        # Store using sanitized key field (replace path separators)
-        sanitized = sanitize_key_field(name)
-        existing[sanitized] = str(value)
-        return client.set_secret(path, existing)
+        with _locked_paths(path):
+            # Merge with existing data to preserve other keys under the same agent secret
+            existing = client.get_secret(path, missing={})
+            if existing is None:
+                # Writing without the current fields would drop them
+                return False
+            # Store using sanitized key field (replace path separators)
+            sanitized = sanitize_key_field(name)
+            existing[sanitized] = str(value)
+            success = client.set_secret(path, existing)
+            _write_through_scope_secret(path, existing, success)
+            _SCOPE_LIST_CACHE.write(user_id)
+        return success
     except Exception as e:
-        logger.error(f"Failed to store agent connection in vault: {str(e)}")
+        logger.error("Failed to store agent connection in vault: {}", e)
         return False
 
 
+def store_agent_connections_in_vault(connections: List[Dict[str, Any]], user_id: str) -> List[bool]:
+    """Store several agent connection values with one read and one write per secret path.
+
+    Connections that share a scope (same agent, common or default) live in the same
+    secret, so their fields are merged into it together rather than one write each.
+
+    Args:
+        connections: Agent connection dicts, as for store_agent_connection_in_vault.
+        user_id: Vault user id (may come from header).
+
+    Returns:
+        List[bool]: Whether each connection was stored, in input order.
+    """
+    results = [False] * len(connections)
+    if not ENABLE_VAULT_INTEGRATION:
+        return results
+
+    client = get_vault_client()
+    if not client:
+        return results
+
+    # path -> (indexes of the connections written there, {sanitized name: value})
+    pending: Dict[str, Tuple[List[int], Dict[str, str]]] = {}
+    for index, connection in enumerate(connections):
+        name = connection.get("name")
+        value = connection.get("value")
+        if not name or value is None:
+            continue
+        path = format_secret_key(name, user_id, connection.get("agent_id"), connection.get("is_common", False))
+        indexes, fields = pending.setdefault(path, ([], {}))
+        indexes.append(index)
+        fields[sanitize_key_field(name)] = str(value)
+
+    for path, (indexes, fields) in pending.items():
+        try:
+            with _locked_paths(path):
+                # Merge with existing data to preserve other keys under the same agent secret
+                existing = client.get_secret(path, missing={})
+                if existing is None:
+                    success = False
+                else:
+                    existing.update(fields)
+                    success = client.set_secret(path, existing)
+                    _write_through_scope_secret(path, existing, success)
+        except Exception as e:
+            logger.error("Failed to store agent connections in vault: {}", e)
+            success = False
+        for index in indexes:
+            results[index] = success
+    if pending:
+        _SCOPE_LIST_CACHE.write(user_id)
+    return results
+
+
+def _read_scope_secret(client: VaultClient, path: str) -> Optional[Dict[str, Any]]:
+    """Read one scope secret through _SCOPE_SECRET_CACHE; the result must not be mutated.
+
+    A secret that does not exist is cached as {}. A failed read returns None and is
+    not cached, so an outage is not remembered as an empty scope. Neither is a read
+    that a write to the same path overlapped, since it may predate that write.
+    """
+    secret = _SCOPE_SECRET_CACHE.get(path)
+    if secret is None:
+        generation = _SCOPE_SECRET_CACHE.begin(path)
+        try:
+            secret = client.get_secret(path, missing={})
+        finally:
+            _SCOPE_SECRET_CACHE.finish(path, generation, secret)
+    return secret
+
+
 def get_agent_connection_from_vault(
     name: str,
     user_id: str,
@@ -373,18 +821,77 @@ def get_agent_connection_from_vault(
     try:
         # Read from the target (uppercase COMMON) path
         path = format_secret_key(name, user_id, agent_id, is_common)
-        secret = client.get_secret(path)
+        secret = _read_scope_secret(client, path)
+        return secret.get(sanitize_key_field(name)) if secret is not None else None
+    except Exception as e:
+        logger.error("Failed to get agent connection from vault: {}", e)
+        return None
 
-        if secret:
-            sanitized = sanitize_key_field(name)
-            if sanitized in secret:
-                return secret[sanitized]
 
+def list_agent_connection_scopes(user_id: str, recache: bool = False) -> Optional[Tuple[str, ...]]:
+    """List the agent scopes stored under users/<user_id>, keeping their stored case.
+
+    Args:
+        user_id: Vault user id.
+        recache: Skip the cached listing and refresh it.
+
+    Returns:
+        Optional[Tuple[str, ...]]: Scope names (empty if nothing is stored), or None if
+        they could not be listed.
+    """
+    if not ENABLE_VAULT_INTEGRATION:
         return None
-    except Exception as e:
-        logger.error(f"Failed to get agent connection from vault: {str(e)}")
+
+    client = get_vault_client()
+    if not client:
         return None
 
+    if not recache:
+        scopes = _SCOPE_LIST_CACHE.get(user_id)
+        if scopes is not None:
+            return scopes
+    scopes = None
+    generation = _SCOPE_LIST_CACHE.begin(user_id)
+    try:
+        keys = client.list_secrets(f"users/{user_id}")
+        if keys is not None:
+            scopes = tuple(scope.removesuffix('/') for scope in keys)
+    finally:
+        # Not cached if a write for this user overlapped the listing
+        _SCOPE_LIST_CACHE.finish(user_id, generation, scopes)
+    return scopes
+
+
+def get_agent_connection_scope_from_vault(
+    user_id: str,
+    is_common: bool = False,
+    agent_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Get every agent connection value stored in one scope, in a single read.
+
+    Args:
+        user_id: Vault user id.
+        is_common: Whether to read the scope common to all agents.
+        agent_id: Agent identifier (model string) for agent-specific scope.
+
+    Returns:
+        Dict[str, Any]: Values keyed by sanitized key name (empty if nothing is stored).
+    """
+    if not ENABLE_VAULT_INTEGRATION:
+        return {}
+
+    client = get_vault_client()
+    if not client:
+        return {}
+
+    try:
+        path = format_secret_key(None, user_id, agent_id, is_common)
+        secret = _read_scope_secret(client, path)
+        return dict(secret) if secret is not None else {}
+    except Exception as e:
+        logger.error("Failed to get agent connections from vault: {}", e)
+        return {}
+
 
 def delete_agent_connection_from_vault(
     name: str,
@@ -415,19 +922,87 @@ def delete_agent_connection_from_vault(
     try:
         # Attempt deletion on the target (uppercase COMMON) path
         path = format_secret_key(name, user_id, agent_id, is_common)
-        secret = client.get_secret(path)
-        deleted_any = False
-        if secret:
-            sanitized = sanitize_key_field(name)
-            if sanitized in secret:
-                secret.pop(sanitized, None)
+        with _locked_paths(path):
+            secret = client.get_secret(path, missing={})
+            if secret is None:
+                return False
+            deleted_any = False
             if secret:
-                deleted_any = client.set_secret(path, secret)
-            else:
-                deleted_any = client.delete_secret(path)
+                sanitized = sanitize_key_field(name)
+                if sanitized in secret:
+                    secret.pop(sanitized, None)
+                if secret:
+                    deleted_any = client.set_secret(path, secret)
+                else:
+                    deleted_any = client.delete_secret(path)
+                _write_through_scope_secret(path, secret, deleted_any)
+                _SCOPE_LIST_CACHE.write(user_id)
 
         # If path/field didn't exist, treat as success
         return True if not deleted_any else deleted_any
     except Exception as e:
-        logger.error(f"Failed to delete agent connection from vault: {str(e)}")
+        logger.error("Failed to delete agent connection from vault: {}", e)
+        return False
+
+
+def move_agent_connection_in_vault(
+    name: str,
+    user_id: str,
+    connection: Dict[str, Any],
+    is_common: bool = False,
+    agent_id: Optional[str] = None
+) -> Optional[bool]:
+    """Update an agent connection field, moving it if its name or scope changes.
+
+    The new entry is written before the old field is removed, so a failure part-way
+    never leaves the key missing from both places. Without a value in ``connection``,
+    the current one is carried over. It is read live, under the same path locks as the
+    writes, so a concurrent update of the old field cannot be lost.
+
+    Args:
+        name: Current field name.
+        user_id: Vault user id.
+        connection: New connection data, as for store_agent_connection_in_vault; a
+            None value keeps the current one.
+        is_common: Whether the current field is common to all agents.
+        agent_id: Agent identifier (model string) of the current field.
+
+    Returns:
+        Optional[bool]: True if stored, False if it failed, None if there is no current
+        value to carry over.
+    """
+    if not ENABLE_VAULT_INTEGRATION:
+        return False
+
+    client = get_vault_client()
+    if not client:
+        return False
+
+    try:
+        old_path = format_secret_key(name, user_id, agent_id, is_common)
+        new_path = format_secret_key(
+            connection.get("name"), user_id, connection.get("agent_id"), connection.get("is_common", False)
+        )
+        old_field = sanitize_key_field(name)
+        moved = (old_path, old_field) != (new_path, sanitize_key_field(connection.get("name")))
+        with _locked_paths(old_path, new_path):
+            if connection.get("value") is None:
+                current = client.get_secret(old_path, missing={})
+                if current is None:
+                    return False
+                if old_field not in current:
+                    return None
+                connection = {**connection, "value": current[old_field]}
+
+            if not store_agent_connection_in_vault(connection, user_id):
+                return False
+            # Only drop the old entry if it actually lives somewhere else
+            if moved and not delete_agent_connection_from_vault(name, user_id, is_common, agent_id):
+                logger.warning(
+                    "Stored {} but could not remove previous key {} for user {}",
+                    connection.get("name"), name, user_id
+                )
+        return True
+    except Exception as e:
+        logger.error("Failed to move agent connection in vault: {}", e)
         return False